@@ -0,0 +1,177 @@
+import hashlib
+import os
+import stat
+from Validator import Validator
+
+
+class AssetStore:
+    """
+    Holds the text and images shared between worlds, each stored only once however many rooms or worlds use it. Every
+    asset is identified by the SHA-256 hash of its content and counts how many users currently hold it; once the last
+    of these releases it, through 'release', it is dropped from memory.
+
+    Only text is held in memory. Images are tracked by hash alone (their content being None), as they are read from
+    disk by whatever displays them (see GUI and ImageService modules); the hash still shows which worlds share an
+    image, and when an image has changed.
+    """
+
+    def __init__(self):
+        self.assets = {}      # Contains (hash, [content, reference count]) pairs, content being None for images
+        self.imagePaths = {}  # Contains (path, (modified time, size, hash)) pairs, so unchanged files are not re-read
+
+    def __len__(self):
+        return len(self.assets)
+
+    def size(self) -> int:
+        """Returns the total size, in bytes, of every asset held."""
+
+        return sum(len(content.encode("utf-8")) for content, _ in self.assets.values() if content is not None)
+
+    def add(self, key: str, content):
+        """
+        Adds a reference to an asset, storing its content if not already held. Returns the content held, so that
+        identical content is always the same object.
+
+        :param key: str
+        :param content: str
+        """
+
+        entry = self.assets.setdefault(key, [content, 0])
+        entry[1] += 1
+        return entry[0]
+
+    def addText(self, text: str):
+        """
+        Adds a reference to a block of text, returning its (hash, shared text) pair.
+
+        :param text: str
+        :return: tuple
+        """
+
+        key = "text:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return key, self.add(key, text)
+
+    def addImage(self, path: str):
+        """
+        Adds a reference to the image at the given path, returning its hash, or None if there is no such file. The file
+        is hashed a block at a time, and its content is not kept.
+
+        :param path: str
+        :return: str
+        """
+
+        try:
+            status = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(status.st_mode):  # E.g. a room given no image, whose path is that of the game's directory
+            return None
+
+        known = self.imagePaths.get(path)
+        if known is not None and known[:2] == (status.st_mtime_ns, status.st_size) and known[2] in self.assets:
+            key = known[2]
+            self.assets[key][1] += 1
+            return key
+
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as file:
+                for block in iter(lambda: file.read(65536), b""):
+                    digest.update(block)
+        except OSError:                       # Removed, or made unreadable, since
+            return None
+        key = "image:" + digest.hexdigest()
+        self.imagePaths[path] = (status.st_mtime_ns, status.st_size, key)
+        self.add(key, None)
+        return key
+
+    def release(self, key: str):
+        """
+        Removes a reference to an asset, dropping it once no references remain.
+
+        :param key: str
+        """
+
+        entry = self.assets[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.assets[key]
+
+
+class WorldCatalog:
+    """
+    Loads several worlds - i.e. games of different titles, each possibly its own subclass of Game with its own
+    'createRooms' - side by side within one process, so that a single server may host them all. Room text and images
+    are added to a shared AssetStore as each world is loaded, so that content common to several worlds is held only
+    once; when a world is retired, its assets are released, and those no other world uses are dropped.
+
+    Each world is kept as a template (see Game's 'template' method); games are created from it by 'createGame', and
+    share its rooms rather than copying them.
+    """
+
+    TEXT_ATTRIBUTES = ("description", "wordDescription", "writtenHint")
+
+    def __init__(self):
+        self.assets = AssetStore()
+        self.worlds = {}  # Contains (title, (template, [asset hashes])) pairs
+
+    def loadWorld(self, gameClass: type, title: str):
+        """
+        Loads the world of the given Game class under the given title, replacing any world already of that title.
+
+        :param gameClass: type
+        :param title: str
+        :return: Game object
+        """
+
+        template = gameClass.template(title)
+        validator = Validator(template)  # Checked once per load, rather than for every game created from it
+        if str(validator):
+            print("[The world '%s' contains the following mistakes:]" % title)
+            print(validator)
+
+        keys = []
+        for room in template.allRooms():
+            for attribute in self.TEXT_ATTRIBUTES:  # Each text replaced by the identical text already held, if any
+                key, text = self.assets.addText(getattr(room, attribute))
+                setattr(room, attribute, text)
+                keys.append(key)
+            items = []
+            for item in room.items:
+                key, text = self.assets.addText(item)
+                items.append(text)
+                keys.append(key)
+            room._items = tuple(items)  # Items the room begins with, as no game has been created from it yet
+            key = self.assets.addImage(template.resolvePath(room.roomImg))
+            if key is not None:
+                keys.append(key)
+
+        if title in self.worlds:
+            self.retireWorld(title)
+        self.worlds[title] = (template, keys)
+        return template
+
+    def retireWorld(self, title: str):
+        """
+        Removes a world, releasing every asset it used.
+
+        :param title: str
+        """
+
+        _, keys = self.worlds.pop(title)
+        for key in keys:
+            self.assets.release(key)
+
+    def template(self, title: str):
+        return self.worlds[title][0]
+
+    def createGame(self, title: str):
+        """
+        Creates a new game of the given world.
+
+        :param title: str
+        :return: Game object
+        """
+
+        template = self.template(title)
+        return template.__class__(title, template=template)
@@ -0,0 +1,82 @@
+import builtins
+import io
+import threading
+from collections import deque
+from contextlib import redirect_stdout
+
+
+class Console:
+    """
+    Allows the game to be run without a player sat at the keyboard. Every class in this project reads the player's
+    keyboard through 'input()' and informs them through 'print()', so while a Console is open both are redirected:
+    'input()' is answered from the scripted 'lines' given, and anything printed is collected for 'text' to return.
+
+    Once every scripted line has been read, 'EOFError' is raised (as 'input()' itself does at the end of a file),
+    unless a 'default' line is given to be repeated instead, or 'passThrough' is True, in which case any further input
+    is read from the keyboard as usual. Since 'input' and standard output are shared by the whole process, only one
+    thread may have Consoles open at a time; others wait upon the class' 'lock' attribute.
+    """
+
+    lock = threading.RLock()
+
+    def __init__(self, *lines: str, default=None, capture=True, passThrough=False):
+        """
+        Initialises the console with the lines to be fed to 'input()', in order.
+
+        :param lines: str
+        :param default: str
+        :param capture: bool
+        :param passThrough: bool
+        """
+
+        self.lines = deque(lines)
+        self.default = default
+        self.capture = capture
+        self.passThrough = passThrough
+        self.output = io.StringIO()
+
+    def __enter__(self):
+        Console.lock.acquire()
+        self.realInput = builtins.input
+        builtins.input = self.readLine      # All following 'input()' calls are answered by this console
+        if self.capture:
+            self.redirect = redirect_stdout(self.output)
+            self.redirect.__enter__()       # All following 'print()' calls are collected within 'output'
+        return self
+
+    def __exit__(self, *exception):
+        if self.capture:
+            self.redirect.__exit__(*exception)
+        builtins.input = self.realInput
+        Console.lock.release()
+        return False
+
+    def readLine(self, prompt=""):
+        """
+        Stands in for 'input()' while the console is open, returning the next scripted line.
+
+        :param prompt: str
+        :return: str
+        """
+
+        if self.lines:
+            return self.lines.popleft()
+        if self.default is not None:
+            return self.default
+        if self.passThrough:
+            return self.realInput(prompt)
+        raise EOFError("No more scripted input.")
+
+    def feed(self, *lines: str):
+        """
+        Adds further lines to be read after those already scripted.
+
+        :param lines: str
+        """
+
+        self.lines.extend(lines)
+
+    def text(self) -> str:
+        """Returns everything printed while the console was open."""
+
+        return self.output.getvalue()
@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import os
+import random
+import signal
+import threading
+import time
+import traceback
+from Console import Console
+from Game import Game
+from Rooms import Room
+
+
+class Hang(Exception):
+    """Raised within a script which runs for longer than the fuzzer's 'timeout'."""
+
+
+class Fuzzer:
+    """
+    Searches for inputs which crash the game, by running many short scripts of player input through a headless game
+    (see Console module) within this process. Each script is a list of lines, each line entered as at the '> ' prompt;
+    a line may carry several commands and answers separated by ';', and any question a command asks which its own line
+    does not answer is answered by the script's following lines, as though typed at the keyboard. A script ends once
+    every line has been read ('EOFError' being raised to the game as at the end of a file, which is not a crash), the
+    player quits or the exit is reached.
+
+    Scripts are either generated from the game's grammar - its action words, directions, room names, interactions and
+    item indices, along with awkward numbers and characters - or made by mutating scripts already within the corpus.
+    A script is added to the corpus when it produces output or reaches a state no earlier script has; the corpus is kept
+    within 'corpusDir', one script per file, so that later runs continue where this one finished.
+
+    Any other exception raised is a crash. Its script is reduced to the fewest lines, commands and characters still
+    raising the same exception from the same line of code (by delta debugging), then saved within 'crashDir' as a
+    '.txt' script, which may be replayed with 'python Fuzzer.py --replay FILE', alongside a '.log' of its traceback.
+    """
+
+    INTERACTIONS = ('TAKE', 'OPEN', 'CHECK', 'RETRIEVE', 'STORE', 'CLOSE', 'PASS')
+    NUMBERS = ('1', '2', '3', '0', '4', '-1', '01', '99', ' 1', '1.0', '١', '²', '½', '\U0001d7d9',
+               'Ⅻ', '')  # Includes digits and numerals of other scripts, which 'int()' may or may not accept
+    NOISE = ('', ' ', ';', ';;', '\t', '=', '#', '\x00', 'ß', 'ﬀ', 'İ', '​', 'é', '\U0001f600')
+    DIGITS = str.maketrans("0123456789", "##########")  # Numbers within output ignored when finding features
+    WALKTHROUGH = [    # Winning playthrough of the default game, so that mutations begin from every room
+        "INTERACT;TAKE;GO EAST;INTERACT;TAKE;GO WEST;GO WEST;GO NORTH;INTERACT;OPEN;STORE;1;STORE;1;CLOSE",
+        "GO LADDER;INTERACT;TAKE;GO EAST;GO UP;INTERACT;TAKE;INTERACT;TAKE;GO UPSTAIRS;GOTO ATTIC;GO HATCH",
+        "GOTO STORAGE ROOM;INTERACT;OPEN;STORE;1;STORE;1;CLOSE;GOTO KITCHEN;INTERACT;TAKE;GOTO LOBBY;GO SOUTH"
+    ]
+
+    def __init__(self, gameClass=Game, corpusDir="corpus", crashDir="crashes", seed=None, maxLines=12, timeout=2.0):
+        """
+        Initialises the fuzzer, loading every script already within 'corpusDir'.
+
+        :param gameClass: type
+        :param corpusDir: str
+        :param crashDir: str
+        :param seed: int
+        :param maxLines: int
+        :param timeout: float
+        """
+
+        self.gameClass = gameClass
+        self.corpusDir = corpusDir
+        self.crashDir = crashDir
+        self.random = random.Random(seed)
+        self.maxLines = maxLines
+        self.timeout = timeout
+
+        self.roomNames = [room.description.upper() for room in gameClass.template().allRooms()]
+        self.directions = list(Room.allDirections) + ['NORTHEAST', 'UP STAIRS']
+        self.macroNames = ['LOOT', 'TOUR', 'X']
+
+        self.game = None       # Game reused by each script run, see 'run'
+        self.corpus = []
+        self.features = set()  # Hashes of every output line and final state produced by the corpus so far
+        self.crashes = {}      # Contains (signature, minimised script) pairs
+        self.executions = 0
+        self.commands = 0
+
+        for directory in (corpusDir, crashDir):
+            os.makedirs(directory, exist_ok=True)
+        for name in sorted(os.listdir(corpusDir)):
+            script = self.load(os.path.join(corpusDir, name))
+            self.features |= self.run(script)[0]
+            self.corpus.append(script)
+        if len(self.corpus) == 0:
+            self.consider(list(self.WALKTHROUGH))
+
+    @staticmethod
+    def load(path: str) -> list:
+        """
+        Reads a script saved by 'save', one line of input per line of the file.
+
+        :param path: str
+        :return: list
+        """
+
+        with open(path, encoding="utf-8", newline="\n") as file:
+            return file.read().split("\n")
+
+    @staticmethod
+    def save(path: str, script: list):
+        with open(path, "w", encoding="utf-8", newline="\n") as file:
+            file.write("\n".join(script))
+
+    @staticmethod
+    def scriptName(script: list) -> str:
+        return hashlib.sha1("\n".join(script).encode("utf-8", "surrogatepass")).hexdigest()[:16]
+
+    def command(self) -> str:
+        """Returns a single command generated from the game's grammar, along with any answers to its questions."""
+
+        choice = self.random.random()
+        if choice < 0.3:
+            return "GO " + self.random.choice(self.directions)
+        if choice < 0.45:
+            return self.random.choice(("ROUTE ", "GOTO ")) + self.random.choice(self.roomNames)
+        if choice < 0.7:
+            answers = [self.random.choice(self.INTERACTIONS) for _ in range(self.random.randint(0, 3))]
+            for index, answer in enumerate(answers):
+                if answer in ('STORE', 'RETRIEVE'):
+                    answers[index] += ";" + self.random.choice(self.NUMBERS + ('PASS',))
+            return ";".join(["INTERACT"] + answers)
+        if choice < 0.8:
+            return self.random.choice(('INSPECT', 'INVENTORY', 'HINT', 'MENU'))
+        if choice < 0.86:
+            return "UNDO " + self.random.choice(self.NUMBERS)
+        if choice < 0.92:
+            return "MACRO %s = %s" % (self.random.choice(self.macroNames), self.line(macro=False))
+        if choice < 0.97:
+            return self.random.choice(self.macroNames)
+        if choice < 0.99:
+            return self.random.choice(self.NOISE + self.NUMBERS + self.INTERACTIONS)
+        return "QUIT"
+
+    def line(self, macro=True) -> str:
+        """
+        Returns a line of one or more generated commands. Macro definitions are kept to lines of their own, as their
+        commands otherwise include the rest of the line.
+
+        :param macro: bool
+        :return: str
+        """
+
+        commands = [self.command() for _ in range(self.random.randint(1, 4))]
+        if not macro or any(command.startswith("MACRO") for command in commands):
+            commands = [command for command in commands if not command.startswith("MACRO")] or ["INSPECT"]
+            if macro:
+                return "MACRO %s = %s" % (self.random.choice(self.macroNames), ";".join(commands))
+        return self.random.choice((";", "; ", " ; ")).join(commands)
+
+    def generate(self) -> list:
+        return [self.line() for _ in range(self.random.randint(1, self.maxLines))]
+
+    def mutate(self, script: list) -> list:
+        """
+        Returns a copy of the script changed in one to four random ways.
+
+        :param script: list
+        :return: list
+        """
+
+        script = list(script)
+        for _ in range(self.random.randint(1, 4)):
+            choice = self.random.randrange(9)
+            index = self.random.randrange(len(script)) if script else 0
+            if choice == 0 or not script:                                        # Inserts a generated line
+                script.insert(index, self.line())
+            elif choice == 1 and len(script) > 1:                                # Removes a line
+                del script[index]
+            elif choice == 2:                                                    # Repeats a line
+                script.insert(index, script[index])
+            elif choice == 3:                                                    # Splices with another corpus script
+                other = self.random.choice(self.corpus)
+                script = script[:index] + other[self.random.randrange(len(other) + 1):]
+            elif choice == 4 and index + 1 < len(script):                        # Joins two lines as one
+                script[index:index + 2] = [script[index] + ";" + script[index + 1]]
+            elif choice == 5:                                                    # Splits a line at its separators
+                script[index:index + 1] = script[index].split(";")
+            elif choice == 6:                                                    # Replaces a word
+                words = script[index].split(" ")
+                words[self.random.randrange(len(words))] = self.random.choice(
+                    self.NUMBERS + self.NOISE + self.INTERACTIONS + tuple(self.directions) + Game.actionWords
+                )
+                script[index] = " ".join(words)
+            elif choice == 7:                                                    # Inserts or removes a character
+                text = script[index]
+                position = self.random.randint(0, len(text))
+                if self.random.random() < 0.5 and text:
+                    script[index] = text[:position] + text[position + 1:]
+                else:
+                    script[index] = text[:position] + self.random.choice(self.NOISE + self.NUMBERS) + text[position:]
+            else:                                                                # Changes case
+                script[index] = self.random.choice((str.lower, str.title, str.swapcase))(script[index])
+        return script[:self.maxLines * 4]
+
+    def run(self, script: list):
+        """
+        Runs a script through a new game, returning the features (see 'consider') it produced, and the exception it
+        raised if any. The game's output is kept within the 'output' attribute.
+
+        :param script: list
+        :return: tuple
+        """
+
+        game = self.game
+        if game is None:
+            game = self.game = self.gameClass()
+        else:                          # Returning the last game to its start is far quicker than creating another
+            game.rewind(0)
+            game.macros, game.moves, game.commands, game.startTime = {}, 0, 0, None
+
+        alarm = self.timeout and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, self.timeout)
+        exception = None
+        try:
+            with Console(*script) as console:
+                try:
+                    while console.lines:
+                        if game.runLine(console.readLine(), passThrough=True) or game.currentRoom == game.exitRoom:
+                            break
+                except EOFError:       # Script has ended partway through a question, as a player closing their input
+                    pass
+        except Exception as error:
+            exception = error
+            self.game = None           # Game may have been left part way through an action, so is not used again
+        finally:
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+        self.executions += 1
+        self.commands += game.commands
+        self.output = console.text()
+
+        inputWords = set(" ".join(script).upper().replace(";", " ").split())
+        features = set()
+        for outputLine in self.output.splitlines():  # Player's own words and numbers masked, so that only new
+            shape = " ".join("*" if word.upper().strip("[]'\".,") in inputWords else word  # responses count
+                             for word in outputLine.split())
+            features.add(hash(shape.translate(self.DIGITS)))
+        features.add(hash((game.currentRoom.description, tuple(sorted(game.player.inventory)),
+                           tuple(sorted(game.player.storageBox)))))
+        return features, exception
+
+    @staticmethod
+    def signature(exception: BaseException) -> str:
+        """
+        Identifies a crash by its exception type and the innermost line of this project's code to raise it.
+
+        :param exception: BaseException
+        :return: str
+        """
+
+        frames = traceback.extract_tb(exception.__traceback__)
+        here = os.path.dirname(os.path.abspath(__file__))
+        ownFrames = [frame for frame in frames if os.path.dirname(os.path.abspath(frame.filename)) == here]
+        frame = (ownFrames or frames)[-1]
+        return "%s at %s:%d" % (type(exception).__name__, os.path.basename(frame.filename), frame.lineno)
+
+    def consider(self, script: list):
+        """
+        Runs a script, adding it to the corpus if it produced any new feature, or minimising and saving it if it
+        crashed.
+
+        :param script: list
+        """
+
+        features, exception = self.run(script)
+        if exception is not None:
+            signature = self.signature(exception)
+            if signature not in self.crashes:
+                self.crashes[signature] = self.minimise(script, signature)
+                self.report(signature)
+        elif not features <= self.features:
+            self.features |= features
+            self.corpus.append(script)
+            self.save(os.path.join(self.corpusDir, self.scriptName(script) + ".txt"), script)
+
+    def crashesWith(self, signature: str, script: list) -> bool:
+        exception = self.run(script)[1]
+        return exception is not None and self.signature(exception) == signature
+
+    def minimise(self, script: list, signature: str) -> list:
+        """
+        Reduces a crashing script to the fewest lines, then commands within each line, then characters within each
+        line, which still crash with the same signature.
+
+        :param script: list
+        :param signature: str
+        :return: list
+        """
+
+        script = self.ddmin(script, lambda lines: self.crashesWith(signature, lines))
+        for index in range(len(script)):
+            def crashesWithLine(parts, separator):
+                return self.crashesWith(signature, script[:index] + [separator.join(parts)] + script[index + 1:])
+            script[index] = ";".join(self.ddmin(script[index].split(";"), lambda parts: crashesWithLine(parts, ";")))
+            script[index] = "".join(self.ddmin(list(script[index]), lambda parts: crashesWithLine(parts, "")))
+        return script
+
+    @staticmethod
+    def ddmin(parts: list, test) -> list:
+        """
+        Delta debugging: returns a subsequence of 'parts' for which 'test' still holds, from which no single part may
+        be removed without it failing. Removes ever smaller chunks in turn, beginning with halves.
+
+        :param parts: list
+        :param test: function
+        :return: list
+        """
+
+        chunks = 2
+        while len(parts) >= 2:
+            size = -(-len(parts) // chunks)  # Ceiling division
+            reduced = False
+            for start in range(0, len(parts), size):
+                complement = parts[:start] + parts[start + size:]
+                if test(complement):
+                    parts = complement
+                    chunks = max(chunks - 1, 2)
+                    reduced = True
+                    break
+            if not reduced:
+                if size == 1:
+                    break
+                chunks = min(chunks * 2, len(parts))
+        return parts
+
+    def report(self, signature: str):
+        """
+        Saves a minimised crash as a script with its traceback, then informs the user.
+
+        :param signature: str
+        """
+
+        script = self.crashes[signature]
+        path = os.path.join(self.crashDir, hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16])
+        self.save(path + ".txt", script)
+        exception = self.run(script)[1]
+        with open(path + ".log", "w", encoding="utf-8") as file:
+            file.write(signature + "\n\n")
+            file.write("".join(traceback.format_exception(type(exception), exception, exception.__traceback__)))
+        print("[Crash: %s - %d line script saved to %s.txt]" % (signature, len(script), path))
+
+    def fuzz(self, seconds=60.0, executions=None):
+        """
+        Runs generated and mutated scripts until 'seconds' have passed or 'executions' have been run, then prints a
+        summary.
+
+        :param seconds: float
+        :param executions: int
+        """
+
+        previousHandler = None
+        if threading.current_thread() is threading.main_thread() and hasattr(signal, "SIGALRM"):
+            previousHandler = signal.signal(signal.SIGALRM, self.hang)
+
+        start = time.perf_counter()
+        startExecutions, startCommands = self.executions, self.commands
+        try:
+            while time.perf_counter() - start < seconds and (executions is None or
+                                                              self.executions - startExecutions < executions):
+                if self.random.random() < 0.2:
+                    self.consider(self.generate())
+                else:
+                    self.consider(self.mutate(self.random.choice(self.corpus)))
+        finally:
+            if previousHandler is not None:
+                signal.signal(signal.SIGALRM, previousHandler)
+
+        elapsed = time.perf_counter() - start
+        print("[%d scripts (%d commands) in %.1fs - %d scripts/s, %d commands/s. Corpus: %d scripts, crashes: %d.]" % (
+            self.executions - startExecutions, self.commands - startCommands, elapsed,
+            (self.executions - startExecutions) / elapsed, (self.commands - startCommands) / elapsed,
+            len(self.corpus), len(self.crashes)
+        ))
+
+    def hang(self, signalNumber, frame):
+        raise Hang("Script ran for longer than %.1fs." % self.timeout)
+
+    def replay(self, path: str):
+        """
+        Runs a saved script, printing the game's output and any traceback.
+
+        :param path: str
+        """
+
+        exception = self.run(self.load(path))[1]
+        print(self.output)
+        if exception is None:
+            print("[Script ran without crashing.]")
+        else:
+            traceback.print_exception(type(exception), exception, exception.__traceback__)
+
+
+def main():
+    """Fuzzes the game for a set time, or replays a saved script."""
+
+    parser = argparse.ArgumentParser(description="Fuzzes the game's command input for crashes.")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--corpus", default="corpus", help="directory of scripts kept between runs")
+    parser.add_argument("--crashes", default="crashes", help="directory minimised crashes are saved to")
+    parser.add_argument("--replay", default=None, help="run a saved script and print its traceback")
+    args = parser.parse_args()
+
+    fuzzer = Fuzzer(corpusDir=args.corpus, crashDir=args.crashes, seed=args.seed)
+    if args.replay is not None:
+        fuzzer.replay(args.replay)
+    else:
+        fuzzer.fuzz(args.seconds)
+
+
+if __name__ == "__main__":
+    main()
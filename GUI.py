@@ -1,3 +1,4 @@
+import os
 import tkinter as tk
 from tkinter import TOP, RIGHT, BOTTOM
 from PIL import ImageTk, Image
@@ -30,7 +31,8 @@ class App:
         self.imgFrame.pack(side=RIGHT)                                      # Frame packed into window, on right side
 
         # Once frame created, Tkinter label packed with 'coverImg' image to display when GUI is instanced.
-        self.coverImg = ImageTk.PhotoImage(Image.open('images/Exterior.jpeg').resize((350, 300), Image.ANTIALIAS))
+        cover = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images/Exterior.jpeg')
+        self.coverImg = ImageTk.PhotoImage(Image.open(cover).resize((350, 300), Image.LANCZOS))
         self.currentRoomImg = tk.Label(self.imgFrame, image=self.coverImg, bg="GRAY10")
         self.currentRoomImg.pack(side=TOP)
 
@@ -95,8 +97,9 @@ class App:
         :param game: object
         """
 
-        img = self.prepareImg(game.currentRoom.roomImg)  # Prepares image for updating through 'prepareImg' method
-        self.currentRoomImg.configure(image=img)         # Configures new image for current room, displaying in GUI
+        path = game.resolvePath(game.currentRoom.roomImg)  # Found beside the game's module, wherever run from
+        img = self.prepareImg(path)                        # Prepares image for updating through 'prepareImg' method
+        self.currentRoomImg.configure(image=img)           # Configures new image for current room, displaying in GUI
 
     def refresh(self, game: object):
         """
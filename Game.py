@@ -1,8 +1,18 @@
+import argparse
+import os
+import sys
+import time
 import tkinter as tk
 from Rooms import Room
 from Player import Player
 import Text
 import GUI
+from Console import Console
+from Metrics import registry
+from Routing import RouteIndex, RouteTooFar
+from Validator import Validator
+from History import WorldState, SessionState
+from Leaderboard import Leaderboard
 
 
 class Game:
@@ -13,8 +23,8 @@ class Game:
 
     A primary, core gameplay loop is outlined within the 'play' class method, which assigns any required functionality
     to other methods for handling. Each of these methods may be directed to by 'runAction', which takes a user input
-    through the 'prepareInput' method and assesses which of these should be carried out - all valid action word inputs
-    are listed within the 'actions' attribute.
+    through the 'runLine' method (or 'prepareInput', within nested loops) and assesses which of these should be carried
+    out - all valid action word inputs are listed within the 'actions' attribute.
     'doGoAction', 'doMenuAction' and 'doInteractAction' methods when called handle these nested functionalities, the
     latter being its own self-contained gameplay loop.
 
@@ -23,23 +33,47 @@ class Game:
     (Please refer to each class and their methods for further explanation on how to implement these features.)
     """
 
-    def __init__(self, title="The Mysterious Mansion"):
+    # Every action word handled by 'runAction'
+    actionWords = ('GO', 'ROUTE', 'GOTO', 'INTERACT', 'INSPECT', 'INVENTORY', 'HINT', 'UNDO', 'MENU', 'QUIT')
+
+    # Most commands a single line of input may expand to, and most macros it may expand; see 'expandCommands'
+    maxCommands = 200
+
+    def __init__(self, title="The Mysterious Mansion", template=None):
         """
         Upon being initialised, creation of the area in which the game takes place is handled by the 'createRooms'
         method, while the player's starting room is assigned also. The Player class is then instanced, responsible for
         handling all of the players attributes, and the game's narrative is handled by each class within the Text
         module.
+
+        The rooms are those of a 'template' (see 'template' method) if one is given, e.g. by the Catalog module's
+        WorldCatalog, otherwise of a template created for this game alone. Rooms are shared with every other game of
+        the same template rather than copied; only the player, their current room and the items and locks they have
+        changed (see History module) are this game's own.
+
+        :param title: str
+        :param template: Game object
         """
 
         self.title = title
 
-        self.createRooms()                 # Creates area layout and fills with rooms
-        self.currentRoom = self.startRoom  # Sets start room for player
+        if template is None:
+            template = self.template(title)  # Creates area layout and fills with rooms
+        self.shareRooms(template)            # Shares rooms, and routes between them (see Routing module)
+        self.currentRoom = self.startRoom    # Sets start room for player
+        self.world = WorldState(self.rooms)  # Holds room items and locks (see History module)
 
         self.player = Player()  # Player added
 
+        self.history = [self.saveState()]  # State of game after each action, for use by 'UNDO' action and 'rewind'
+        self.macros = {}                   # Contains (name, commands) pairs defined by the player via 'MACRO'
+        self.moves = 0                     # Number of doors the player has passed through, for the leaderboard
+        self.commands = 0                  # Number of commands run, whether valid or not (e.g. for the Fuzzer module)
+        self.startTime = None              # Time of player's first command, for the leaderboard
+        self.interaction = None            # Question left open by 'doInteractAction' at the end of a line, if any
+
         # Following 'story' attribute initialises the game's narrative, assigning the introductory text for later
-        # printing in UI.
+        # printing in UI (nothing is printed until 'play' is called, see Text module.)
         self.story = Text.Narrative(
             "You're caught in a violent storm,\nforced to find shelter in a nearby building.",
             "Upon entering, its front doors slam shut behind you.",
@@ -50,7 +84,8 @@ class Game:
             title=self.title, exit=self.exitRoom.description
         )
 
-        self.actions = ['GO', 'INSPECT', 'INVENTORY', 'HINT', 'QUIT']  # Base list of valid action words
+        # Base list of valid action words
+        self.actions = ['GO', 'ROUTE', 'GOTO', 'INSPECT', 'INVENTORY', 'HINT', 'UNDO', 'MACRO', 'QUIT']
 
     def createGUI(self):
         """
@@ -65,6 +100,74 @@ class Game:
         call = GUI.App(window)
         window.mainloop()
 
+    @classmethod
+    def template(cls, title="The Mysterious Mansion"):
+        """
+        Returns a template of this game's world: a game object upon which only 'createRooms' has been run, so that its
+        rooms may be checked, indexed or shared without the rest of a game (e.g. its intro) being created. Its rooms are
+        then numbered and indexed by 'indexRooms'.
+
+        :param title: str
+        :return: Game object
+        """
+
+        template = cls.__new__(cls)
+        template.title = title
+        template.createRooms()
+        template.indexRooms(template.allRooms())
+        return template
+
+    def indexRooms(self, rooms: list):
+        """
+        Prepares a template's rooms to be shared by every game created from it: 'rooms' lists them, each numbered by
+        its position ('worldIndex'); 'routes' indexes the doors between them (see Routing module); and 'itemRooms'
+        contains (item, [room numbers]) pairs of where each item is first placed, for use by 'migrate'.
+
+        :param rooms: list of Room objects
+        """
+
+        self.rooms = rooms
+        self.itemRooms = {}
+        for index, room in enumerate(rooms):
+            room.worldIndex = index
+            for item in room.items:
+                self.itemRooms.setdefault(item, []).append(index)
+        self.routes = RouteIndex.fromRooms(rooms)
+
+    @classmethod
+    def resolvePath(cls, path: str) -> str:
+        """
+        Returns a path given relative to the directory of the module defining this game (e.g. a room's 'roomImg'), so
+        that the game's files are found wherever it is run from.
+
+        :param path: str
+        :return: str
+        """
+
+        return os.path.join(os.path.dirname(os.path.abspath(sys.modules[cls.__module__].__file__)), path)
+
+    def allRooms(self) -> list:
+        """
+        Returns every room of the game, each once: those held as attributes ('startRoom' and 'exitRoom' first), followed
+        by every room connected to these through doors, whether locked or not.
+
+        :return: list
+        """
+
+        rooms = []
+        found = set()
+        attributes = [value for value in vars(self).values() if isinstance(value, Room)]
+        for room in [self.startRoom, self.exitRoom] + attributes:
+            if room not in found:
+                found.add(room)
+                rooms.append(room)
+        for room in rooms:                                # List grows as rooms are found, so that all are visited
+            for connectedRoom in room.doors.values():
+                if connectedRoom not in found:
+                    found.add(connectedRoom)
+                    rooms.append(connectedRoom)
+        return rooms
+
     def createRooms(self):
         """
         Method allows for different room configurations to be created, as the user desires. Requires that the
@@ -90,7 +193,7 @@ class Game:
                             "glass, knocked over, has spilt recently..."
         )
         self.roomK = Room(
-            'images/Kitchen.jpg',
+            'images/Kitchen.png',
             "Kitchen",
             wordDescription="Piles of rusting cutlery and mouldy stains render any surface untouchable."
         )
@@ -131,7 +234,7 @@ class Game:
                         "Could one of them be of use?"
         )
         self.roomDC = Room(
-            'images/Dungeon Cell.jpg',
+            'images/Dungeon cell.jpg',
             "Dungeon Cell",
             wordDescription="Anything that once existed in this cell has either been consumed by the rats or time.",
             writtenHint="Fading, you find inscribed onto the brick wall: O', the smell of my masters cooking... So\n"
@@ -164,20 +267,29 @@ class Game:
         self.roomA.createDoor("downstairs", self.roomLi)
         self.roomA.createDoor("hatch", self.roomK, True, self.roomC)
 
-    def play(self):
+    def play(self, leaderboard=None, skipIntro=False):
         """
         Handles the core gameplay loop: while not finished, the loop will request inputs from the player and process
         them through the 'runAction' method, which then assigns further handling of these actions to their
         respective methods (e.g. 'MENU' hands off to 'doMenuAction'.) Once game finished state has been set to 'True',
-        the outro text is displayed in the UI and closing GUI window is opened.
+        the outro text is displayed in the UI and closing GUI window is opened. If won, the run is recorded within
+        'leaderboard' (by default, that stored in 'leaderboard.jsonl'; see Leaderboard module.) The intro is displayed
+        first, unless 'skipIntro' is True.
+
+        :param leaderboard: Leaderboard
+        :param skipIntro: bool
         """
 
+        if not skipIntro:
+            self.story.introText()
+
         finished = False  # Determines whether below gameplay loop should repeat or not
         gameWon = False   # Determines whether player won or quit game
 
         # Core gameplay loop:
         while not finished:
-            finished = self.runAction(self.prepareInput())  # Input requested from player and processed by 'runAction'
+            finished = self.runLine(input("> "), passThrough=True)  # Input requested from player and processed by
+                                                                     # 'runLine', then 'runAction'
 
             if self.currentRoom == self.exitRoom:  # If exit room reached, both the 'finished' and 'gameWon' variables
                 finished = True                    # are set to True, ending the gameplay loop and displaying outro
@@ -191,69 +303,200 @@ class Game:
             "As the morning breeze cools your face, the world now feeling more\n"
             "open than ever, you take one final glimpse over your shoulder and head\n"
             "for home.",
-            winCheck=gameWon
+            winCheck=gameWon, moves=self.moves if gameWon else None
         )
+        if gameWon:
+            self.recordRun(leaderboard if leaderboard is not None else Leaderboard())
         self.createGUI()
 
+    def recordRun(self, leaderboard: object, player="Anonymous"):
+        """
+        Records the player's winning run within the given leaderboard, informing them of the time taken and any
+        placing achieved.
+
+        :param leaderboard: Leaderboard object
+        :param player: str
+        """
+
+        seconds = time.time() - self.startTime if self.startTime is not None else 0.0
+        placings = leaderboard.record(self.title, player, seconds, self.moves)
+        print("[You escaped in %d moves and %.1f seconds.]" % (self.moves, seconds))
+        for category, place in placings.items():
+            if place is not None:
+                print("[You placed #%d for %s.]" % (place, "fewest moves" if category == "moves" else "fastest time"))
+
     @staticmethod
     def prepareInput():
         """
         This method receives player keyboard inputs and prepares them for use within 'runAction'.
 
+        :return: tuple
+        """
+
+        return Game.parseInput(input("> "))  # Input received from player and processed by 'parseInput'
+
+    @staticmethod
+    def parseInput(inputLine: str):
+        """
+        Splits a single line of player input into the action word and direction pair expected by 'runAction'. Kept
+        separate from 'prepareInput' so that lines received from elsewhere (e.g. a remote session, see the Sessions
+        module) are processed identically to those typed at the keyboard.
+
+        :param inputLine: str
         :return: tuple
         """
         actionInput1 = None
         actionInput2 = None
-        inputLine = input("> ")  # Input received from player
-        if inputLine != "":      # Checks if input is empty, returning 'None' if so
-            allWords = inputLine.split()            # Input split at blank-space and assigned to 'allWords', where only
-            actionInput1 = allWords[0].upper()      # first two elements from this list are then returned.
-            if len(allWords) > 1:
+        allWords = inputLine.split()  # Input split at blank-space and assigned to 'allWords', where only
+        if len(allWords) != 0:        # first two elements from this list are then returned. Checks if input is
+            actionInput1 = allWords[0].upper()  # empty (or blank-space only), returning 'None' if so.
+            if actionInput1 in ('ROUTE', 'GOTO') and len(allWords) > 1:
+                actionInput2 = " ".join(allWords[1:]).upper()  # Room names may span several words
+            elif len(allWords) > 1:
                 actionInput2 = allWords[1].upper()
             else:
                 actionInput2 = None
 
         return actionInput1, actionInput2  # Processed inputs returned
 
+    def runLine(self, inputLine: str, passThrough=False):
+        """
+        Runs every command within a single line of player input. A line may carry several commands separated by ';'
+        (e.g. 'GO EAST; INSPECT; INTERACT; TAKE'), including the answers to any questions these commands ask, and any
+        macro the player has defined is replaced by its commands. Each command is then processed by 'runAction' in turn,
+        until all have been run, the player quits or the exit room is reached. Lines beginning 'MACRO' define a macro
+        instead (see 'doMacroAction'.)
+
+        Should a command ask more questions than the line answers, 'EOFError' is raised, unless 'passThrough' is True,
+        in which case the player is asked through the keyboard as usual. An interaction so left asking is kept open
+        (see 'doInteractAction'), and the next line answers it first, as a player at the keyboard would. A line
+        expanding to more than 'maxCommands' commands is not run at all. Returns 'wantToQuit', as 'runAction'.
+
+        :param inputLine: str
+        :param passThrough: bool
+        :return: bool
+        """
+
+        allWords = inputLine.split(None, 1)
+        if len(allWords) > 0 and allWords[0].upper() == "MACRO":
+            self.doMacroAction(allWords[1] if len(allWords) > 1 else "")
+            return False
+
+        commands = self.expandCommands(inputLine)
+        if commands is None:
+            registry.increment("ptp_rejected_inputs_total", "length")
+            print("[That line expands to more than %d commands or macros, so was not run.]" % self.maxCommands)
+            return False
+
+        wantToQuit = False
+        with Console(*commands, capture=False, passThrough=passThrough) as console:
+            if self.interaction is not None:
+                self.resumeInteraction()
+            while console.lines and not wantToQuit and self.currentRoom != self.exitRoom:
+                wantToQuit = self.runAction(self.parseInput(console.readLine()))
+
+        return wantToQuit
+
+    def expandCommands(self, inputLine: str, expanding=(), budget=None) -> list:
+        """
+        Splits a line of input into its separate commands, replacing every macro named with the commands it stands for.
+        A macro named within itself is left unexpanded (tracked through 'expanding'), so that it cannot repeat forever.
+
+        Macros naming other macros may still multiply a line many times over (e.g. 16 macros, each naming the last
+        twice, expand to 65,536 commands), and so every command and every macro expanded is counted against 'budget', a
+        [commands, macros] list shared by each nested expansion, each beginning at 'maxCommands'. (Macros are counted
+        too, as those expanding to no commands may otherwise multiply just as well.) Once either is exhausted,
+        expansion stops and None is returned, so that no more time or memory is spent upon the line than this allows.
+
+        :param inputLine: str
+        :param expanding: tuple
+        :param budget: list
+        :return: list
+        """
+
+        if budget is None:
+            budget = [self.maxCommands, self.maxCommands]
+
+        segments = [segment.strip() for segment in inputLine.split(";")]
+        if len(segments) > 1:
+            segments = [segment for segment in segments if segment != ""]  # Ignores stray separators
+
+        commands = []
+        for segment in segments:
+            name = segment.upper()
+            isMacro = name in self.macros and name not in expanding
+            slot = 1 if isMacro else 0  # Which of 'budget' the segment counts against
+            budget[slot] -= 1
+            if budget[slot] < 0:
+                return None
+            if isMacro:
+                expansion = self.expandCommands(self.macros[name], expanding + (name,), budget)
+                if expansion is None:
+                    return None
+                commands.extend(expansion)
+            else:
+                commands.append(segment)
+        return commands
+
     def runAction(self, action):
         """
         Handles prior processing of inputs received by 'prepareInput' within 'play' method, then assigning latter
         processing as necessary. Returns 'wantToQuit' boolean variable once action processed, informing 'play' whether
-        game's end has been reached or not.
+        game's end has been reached or not. Throughout, rooms' items and locks are those of this game's world state.
         (For more information on how each of the below methods act, please refer to their respective class
         documentation.)
 
         :param action:
         """
 
-        actionWord, direction = action
-        wantToQuit = False  # Determines whether main gameplay loop should terminate
+        with self.world.activate():  # Rooms' items and locks are this game's own while it acts
+            actionWord, direction = action
+            wantToQuit = False  # Determines whether main gameplay loop should terminate
+
+            if self.startTime is None:        # Run is timed from the player's first command
+                self.startTime = time.time()
+            self.commands += 1
 
-        if actionWord == "GO":
-            self.doGoAction(direction)  # Hands off to 'doGoAction' class method to be processed further
+            if actionWord in Game.actionWords:                       # Counts command for metrics (see Metrics module),
+                registry.increment("ptp_commands_total", actionWord)  # invalid inputs counted separately below
 
-        elif actionWord == "INTERACT":
-            self.doInteractAction()  # Hands off to interact gameplay loop
+            if actionWord == "GO":
+                self.doGoAction(direction)  # Hands off to 'doGoAction' class method to be processed further
 
-        elif actionWord == "INSPECT":
-            self.currentRoom.getInfo()  # Calls information on current room through 'getInfo' method (see Room Class)
+            elif actionWord == "ROUTE":
+                self.doRouteAction(direction)  # Hands off to 'doRouteAction', only informing player of the route
 
-        elif actionWord == "INVENTORY":   # Calls status of player's inventory through 'checkInventory' method
-            self.player.checkInventory()  # (see Player Class)
+            elif actionWord == "GOTO":
+                self.doRouteAction(direction, travel=True)  # Hands off to 'doRouteAction', moving player along route
 
-        elif actionWord == "HINT":
-            self.currentRoom.hint(self.player)  # Calls all available hints through 'hint' method (see Room Class)
+            elif actionWord == "INTERACT":
+                self.doInteractAction()  # Hands off to interact gameplay loop
 
-        elif actionWord == "MENU":
-            self.doMenuAction()  # Hands off to 'doMenuAction' class method to be processed further
+            elif actionWord == "INSPECT":
+                self.currentRoom.getInfo()  # Calls information on current room through 'getInfo' (see Room Class)
 
-        elif actionWord == "QUIT":  # Manually quits game
-            wantToQuit = True
+            elif actionWord == "INVENTORY":   # Calls status of player's inventory through 'checkInventory' method
+                self.player.checkInventory()  # (see Player Class)
 
-        else:  # Informs player that invalid input received and of all valid action words
-            print("[You have not entered a valid action word. Enter 'MENU' to see all available actions.]")
+            elif actionWord == "HINT":
+                self.currentRoom.hint(self.player)  # Calls all available hints through 'hint' method (see Room Class)
 
-        return wantToQuit  # Returns boolean expression; informs core gameplay loop whether to terminate or not
+            elif actionWord == "UNDO":
+                self.doUndoAction(direction)  # Hands off to 'doUndoAction', returning to an earlier state
+                return wantToQuit             # Undoing is not itself recorded within history
+
+            elif actionWord == "MENU":
+                self.doMenuAction()  # Hands off to 'doMenuAction' class method to be processed further
+
+            elif actionWord == "QUIT":  # Manually quits game
+                wantToQuit = True
+
+            else:  # Informs player that invalid input received and of all valid action words
+                registry.increment("ptp_rejected_inputs_total", "action")
+                print("[You have not entered a valid action word. Enter 'MENU' to see all available actions.]")
+
+            self.recordState()  # Adds new state of game to history, if changed by action
+            return wantToQuit  # Returns boolean expression; informs core gameplay loop whether to terminate or not
 
     def doGoAction(self, direction: str):
         """
@@ -267,8 +510,208 @@ class Game:
         exit = self.currentRoom.checkExit(direction, self.player)
         if exit == unlocked:
             self.currentRoom = self.currentRoom.doors[direction]  # Updates current room to the given directions room
+            self.moves += 1                                       # Only doors passed count towards the leaderboard
+            registry.increment("ptp_room_visits_total", self.currentRoom.description)
             print("You have entered the %s." % self.currentRoom.description)  # Confirms change of room in user UI
 
+    def doRouteAction(self, roomName: str, travel=False):
+        """
+        Informs player of the shortest route from their current room to the room named, through unlocked doors only,
+        as found by the 'routes' attribute (see Routing module). If 'travel' is True, the player is moved along the
+        route also, one door at a time as through 'doGoAction'.
+
+        :param roomName: str
+        :param travel: bool
+        """
+
+        if roomName is None:
+            print("[Enter the name of the room you wish to reach, e.g. 'ROUTE LIBRARY'.]")
+            return None
+        index = self.routes.findRoom(roomName)
+        if index is None:
+            print("[No room by that name is known. Please check for typos or try another.]")
+            return None
+
+        room = self.rooms[index]
+        try:
+            route = self.routes.route(self.world, self.currentRoom.worldIndex, index)
+        except RouteTooFar:
+            print("[The %s is too far away to plan a route from here. Try a room nearer by first.]" % room.description)
+            return None
+        if route is None:
+            print("You know of no way to the %s yet. Perhaps a door remains locked?" % room.description)
+        elif len(route) == 0:
+            print("You are already in the %s." % room.description)
+        elif not travel:
+            print("[Route to the %s:]" % room.description)
+            print(route)
+        else:
+            for direction in route:
+                self.doGoAction(direction)
+
+    def saveState(self) -> SessionState:
+        """
+        Returns the current state of the game. As every part of this state is immutable (see History module), this
+        takes constant time and memory however large the game, and the state returned is never changed by later
+        actions.
+
+        :return: SessionState
+        """
+
+        return SessionState(self.currentRoom, self.player.inventory, self.player.storageBox, self.world.rooms)
+
+    def restoreState(self, state: SessionState):
+        """
+        Returns the game to a state given by 'saveState', in constant time, even across doors unlocked since: routes
+        are found from the restored locks whenever next asked for (see Routing module), so nothing is recomputed.
+
+        :param state: SessionState
+        """
+
+        self.currentRoom = state.room
+        self.player.inventory = state.inventory
+        self.player.storageBox = state.storageBox
+        self.world.rooms = state.rooms
+
+    def recordState(self):
+        """Adds the current state of the game to 'history', unless unchanged since the last recorded."""
+
+        state = self.saveState()
+        last = self.history[-1]
+        if any(new is not old for new, old in zip(state, last)):
+            self.history.append(state)
+
+    def rewind(self, step: int):
+        """
+        Returns the game to its state after the given step, 0 being its start, discarding all later steps.
+
+        :param step: int
+        """
+
+        if not 0 <= step < len(self.history):
+            raise IndexError("No such step within history.")
+        self.restoreState(self.history[step])
+        del self.history[step + 1:]
+        self.interaction = None  # Any question left open was asked of a later state
+
+    def shareRooms(self, template: object):
+        """
+        Takes every room attribute of a template game (see 'template') as this game's own, along with its 'rooms'
+        list, route index and item index. Rooms are shared rather than copied, so that this takes the same time
+        however large the world.
+
+        :param template: Game object
+        """
+
+        for name, room in vars(template).items():
+            if isinstance(room, Room):
+                setattr(self, name, room)
+        self.rooms = template.rooms
+        self.routes = template.routes
+        self.itemRooms = template.itemRooms
+
+    def migrate(self, template: object):
+        """
+        Moves this game onto a newly compiled version of its world (see 'SessionStore.reloadWorld'), i.e. a template
+        of the new Game class (see 'template'). The template's rooms are shared, then matched with this game's rooms by
+        description, so that the player's progress is kept:
+            - The player is placed in the room of the same description, or the start room if it no longer exists.
+            - Doors the player has unlocked remain unlocked.
+            - Items the player holds or has stored are not placed in rooms a second time.
+        The player's inventory and storage are kept as they are. History begins again from the migrated state, as
+        earlier states refer to rooms which are no longer part of the game. Only the rooms whose state this game has
+        changed, and those first holding the player's items, are visited, so that migrating takes time in proportion
+        to the player's progress rather than to the size of the world.
+
+        :param template: Game object
+        """
+
+        oldRooms, oldWorld = self.rooms, self.world
+        held = set(self.player.inventory) | set(self.player.storageBox)
+        held |= {item[:-len(" (used)")] for item in held if item.endswith(" (used)")}
+
+        self.__class__ = template.__class__  # Methods of the newly loaded class used from now on
+        self.shareRooms(template)
+        self.world = WorldState(self.rooms)
+        with self.world.activate():
+            for oldIndex in oldWorld.changed:
+                oldRoom, oldState = oldRooms[oldIndex], oldWorld.rooms.get(oldIndex)
+                index = self.routes.findRoom(oldRoom.description)
+                if oldState is None or index is None:  # Changes since undone, or room no longer exists
+                    continue
+                room = self.rooms[index]      # Door only remains locked if still locked in old room, or new to it
+                room.locks = {direction for direction in room.locks
+                              if direction in oldState.locks or direction not in oldRoom.doors}
+            for item in held:
+                for index in self.itemRooms.get(item, ()):
+                    room = self.rooms[index]
+                    room.items = tuple(roomItem for roomItem in room.items if roomItem not in held)
+
+        index = self.routes.findRoom(self.currentRoom.description)
+        self.currentRoom = self.rooms[index] if index is not None else self.startRoom
+        self.history = [self.saveState()]
+
+    def resumeInteraction(self):
+        """
+        Continues the interaction left asking a question at the end of the last line of input (see 'doInteractAction'),
+        answering it from the lines now given. Once it ends, the game's state is recorded as after any other action.
+        """
+
+        interactions, choice = self.interaction
+        self.interaction = None
+        with self.world.activate():
+            self.doInteractAction(interactions, choice)
+            self.recordState()
+
+    def doUndoAction(self, count: str):
+        """
+        Undoes the player's last action to change the game, or last 'count' actions if given (e.g. 'UNDO 3').
+
+        :param count: str
+        """
+
+        if count is None:
+            count = "1"
+        if not count.isdecimal() or int(count) == 0:
+            print("[Enter the number of actions to undo, e.g. 'UNDO 2'.]")
+            return None
+        if len(self.history) == 1:
+            print("There is nothing to undo.")
+            return None
+
+        step = max(len(self.history) - 1 - int(count), 0)
+        undone = len(self.history) - 1 - step
+        self.rewind(step)
+        print("[%d action%s undone.] You are in the %s." % (undone, "" if undone == 1 else "s",
+                                                           self.currentRoom.description))
+
+    def doMacroAction(self, definition: str):
+        """
+        Defines a macro from the text following 'MACRO', taking the form 'NAME = COMMAND; COMMAND; ...' (e.g.
+        'MACRO LOOT = INTERACT; TAKE'), after which entering 'LOOT' runs each command in turn. Entering 'MACRO NAME ='
+        removes the macro, while 'MACRO' alone lists every macro defined.
+
+        :param definition: str
+        """
+
+        if definition.strip() == "":
+            if len(self.macros) == 0:
+                print("[No macros defined. e.g. Enter 'MACRO LOOT = INTERACT; TAKE'.]")
+            for name, commands in self.macros.items():
+                print("%s = %s" % (name, commands))
+            return None
+
+        name, equals, commands = definition.partition("=")
+        name = name.strip().upper()
+        if equals == "" or len(name.split()) != 1 or name in Game.actionWords or name == 'MACRO':
+            print("[Please enter a one-word name which is not an action word, e.g. 'MACRO LOOT = INTERACT; TAKE'.]")
+        elif commands.strip() == "":
+            self.macros.pop(name, None)
+            print("[Macro %s removed.]" % name)
+        else:
+            self.macros[name] = commands.strip()
+            print("[Macro %s defined.]" % name)
+
     def doMenuAction(self):
         """
         Informing player of available actions. If no interactions are available, 'INTERACT' not displayed in actions
@@ -276,39 +719,58 @@ class Game:
         """
 
         print("[You may enter the following action words:]")
-        if len(self.currentRoom.items) != 0 or self.currentRoom.roomNo in Room.storageRooms:
+        if len(self.currentRoom.items) != 0 or self.currentRoom.storeroom:
             self.actions.insert(1, 'INTERACT')
             print(self.actions)
             self.actions.remove('INTERACT')
         else:
             print(self.actions)
 
-    def doInteractAction(self):
+    def doInteractAction(self, interactions=None, choice=None):
         """
         Responsible for handling all player interactions, primarily the interaction gameplay loop within this method.
         If the player inputs 'INTERACT" at a valid point of the game, this method runs and allows the player various
         different interactions: access of room storage boxes, in which they can check their storage, store and retrieve
         items, take items from rooms or 'PASS' to continue otherwise.
+
+        Should the player's input run out while they are being asked (i.e. the end of a remote player's line, see
+        Sessions module), the question is kept as the 'interaction' attribute, an (interactions, choice) pair, before
+        'EOFError' is raised; 'resumeInteraction' then continues from the same question, given as 'interactions' (those
+        available) and 'choice' ('STORE' or 'RETRIEVE' if asking which item, otherwise None), without asking it again.
+
+        :param interactions: list
+        :param choice: str
         """
 
-        interactions = ['PASS']  # Base interaction options - 'PASS' is always a valid interaction
+        asked = interactions is not None  # Whether the player has already been asked, i.e. the question is resumed
+        if not asked:
+            interactions = ['PASS']  # Base interaction options - 'PASS' is always a valid interaction
 
-        if self.currentRoom.roomNo in Room.storageRooms:  # Checks if current room is listed as a storage room
-            print("This room contains a storage box. [Enter 'OPEN' to access.]\n")
-            interactions.insert(0, 'OPEN')  # Allows player to access storage
-        if len(self.currentRoom.items) != 0:  # Checks if room contains any items
-            interactions.insert(0, 'TAKE')  # Allows player to pick up items
-        if len(interactions) == 1:
-            print("There is nothing to interact with.")
-            return None
+            if self.currentRoom.storeroom:  # Checks if current room is a storage room
+                print("This room contains a storage box. [Enter 'OPEN' to access.]\n")
+                interactions.insert(0, 'OPEN')  # Allows player to access storage
+            if len(self.currentRoom.items) != 0:  # Checks if room contains any items
+                interactions.insert(0, 'TAKE')  # Allows player to pick up items
+            if len(interactions) == 1:
+                print("There is nothing to interact with.")
+                return None
 
         finished = False  # Determines whether gameplay loop should terminate
 
         # Interaction gameplay loop:
         while not finished:
-            print("[Your available interactions are:]")  # Informs player of available valid actions
-            print(interactions)
-            actionWord, index = self.prepareInput()  # Processes user inputs
+            if choice is not None:  # Which item to store or retrieve is still to be answered
+                actionWord, choice = choice, None
+            else:
+                if not asked:
+                    print("[Your available interactions are:]")  # Informs player of available valid actions
+                    print(interactions)
+                asked = False
+                try:
+                    actionWord, index = self.prepareInput()  # Processes user inputs
+                except EOFError:
+                    self.interaction = (interactions, None)
+                    raise
             if actionWord not in interactions:
                 print("[Please enter a valid interaction word.]\n")
                 continue
@@ -326,12 +788,14 @@ class Game:
                 self.player.checkStorage()
                 continue
 
-            elif actionWord == "RETRIEVE":  # Enables player to retrieve stored items
-                self.player.retrieveItem(self.currentRoom)
-                continue
-
-            elif actionWord == "STORE":  # Enables player to store held items
-                self.player.storeItem(self.currentRoom)
+            elif actionWord in ("RETRIEVE", "STORE"):  # Enables player to retrieve stored items, or store held items
+                move = self.player.retrieveItem if actionWord == "RETRIEVE" else self.player.storeItem
+                try:
+                    move(self.currentRoom, ask=not asked)
+                except EOFError:
+                    self.interaction = (interactions, actionWord)
+                    raise
+                asked = False
                 continue
 
             elif actionWord == "CLOSE":  # Closes storage box, ending interaction gameplay loop
@@ -346,8 +810,16 @@ class Game:
 def main():
     """Instantiates the game and begins play"""
 
+    parser = argparse.ArgumentParser(description="Plays the game.")
+    parser.add_argument("--skip-intro", action="store_true", help="begin play straight away")
+    args = parser.parse_args()
+
     game = Game()
-    game.play()
+    validator = Validator(game)  # Checks area layout for mistakes (see Validator module)
+    if str(validator):
+        print("[This game's rooms contain the following mistakes:]")
+        print(validator)
+    game.play(skipIntro=args.skip_intro)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,206 @@
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+
+# The changeable parts of a room: the items yet to be collected from it (tuple), and its locked directions (frozenset).
+RoomState = namedtuple("RoomState", ["items", "locks"])
+
+# Everything which may change over the course of a game: the player's room, inventory and storage (tuples), and the
+# state of every room (PersistentVector of RoomState). Routes are found from the doors unlocked within the rooms' state
+# whenever asked for (see Routing module), so no state of their own need be kept or restored.
+SessionState = namedtuple("SessionState", ["room", "inventory", "storageBox", "rooms"])
+
+
+class PersistentVector:
+    """
+    A list of fixed length which is never changed once created: 'set' instead returns a new vector with one element
+    replaced. Elements are held within a tree of tuples, 32 to a node, so that the new vector shares every node with
+    the old but those upon the path to the replaced element - for 1,000 elements, just 2 nodes are copied. Holding on to
+    old vectors is therefore cheap, and any may be returned to instantly.
+
+    A node may also be None, standing for a node whose every element is None; such nodes are only created once an
+    element beneath them is set, so that a vector made by 'empty' takes constant memory however long it is.
+    """
+
+    BITS = 5
+    WIDTH = 1 << BITS
+
+    def __init__(self, root: tuple, length: int, shift: int):
+        self.root = root
+        self.length = length
+        self.shift = shift  # Number of index bits below the root node, i.e. BITS times the tree's depth less one
+
+    @classmethod
+    def fromList(cls, values: list):
+        """
+        Creates a vector holding the given values, in order.
+
+        :param values: list
+        :return: PersistentVector
+        """
+
+        nodes = [tuple(values[i:i + cls.WIDTH]) for i in range(0, len(values), cls.WIDTH)] or [()]
+        shift = 0
+        while len(nodes) > 1:  # Groups nodes 32 at a time until a single root node remains
+            nodes = [tuple(nodes[i:i + cls.WIDTH]) for i in range(0, len(nodes), cls.WIDTH)]
+            shift += cls.BITS
+        return cls(nodes[0], len(values), shift)
+
+    @classmethod
+    def empty(cls, length: int):
+        """
+        Creates a vector of the given length whose every element is None, in constant time and memory.
+
+        :param length: int
+        :return: PersistentVector
+        """
+
+        shift = 0
+        while length > cls.WIDTH << shift:
+            shift += cls.BITS
+        return cls(None, length, shift)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self.get(i)
+
+    def get(self, index: int):
+        """
+        Returns the element at the given index.
+
+        :param index: int
+        """
+
+        node = self.root
+        shift = self.shift
+        while shift > 0:
+            if node is None:
+                return None
+            node = node[(index >> shift) & (self.WIDTH - 1)]
+            shift -= self.BITS
+        return None if node is None else node[index & (self.WIDTH - 1)]
+
+    def set(self, index: int, value):
+        """
+        Returns a new vector with the element at the given index replaced by 'value'.
+
+        :param index: int
+        :param value:
+        :return: PersistentVector
+        """
+
+        if not 0 <= index < self.length:
+            raise IndexError("Vector index out of range.")
+
+        def replace(node: tuple, shift: int) -> tuple:
+            if node is None:                                  # Node of None elements, created only now
+                node = (None,) * self.WIDTH
+            slot = (index >> shift) & (self.WIDTH - 1)
+            child = value if shift == 0 else replace(node[slot], shift - self.BITS)
+            return node[:slot] + (child,) + node[slot + 1:]
+
+        return PersistentVector(replace(self.root, self.shift), self.length, self.shift)
+
+
+class WorldState:
+    """
+    Holds the changeable state of every room within one game, while the rooms themselves - their text, doors, and the
+    items and locks they began with - are shared by every game of the same world (see Game's 'template' method.) Each
+    room's 'items' and 'locks' attributes (see Room class) read from and write to the world state active within the
+    current thread, as set by 'activate' while a game acts; with none active, they are those the room began with.
+
+    Room states are held within the 'rooms' attribute: a PersistentVector, holding None for each room this game has
+    not changed, which is replaced, never changed, whenever a room's state changes. Any earlier 'rooms' vector kept
+    therefore records the state of the whole world at that time, and assigning it back restores that state. A new
+    game's vector is empty, so that creating one takes constant time and memory however large its world.
+    """
+
+    def __init__(self, rooms: list):
+        """
+        Initialises the state of a game played upon the given rooms, numbered by their 'worldIndex' attributes.
+
+        :param rooms: list of Room objects
+        """
+
+        self.worldRooms = rooms
+        self.rooms = PersistentVector.empty(len(rooms))
+        self.changed = set()  # Numbers of every room this game has changed the state of, whether since undone or not
+        self.unlocked = ()    # Doors unlocked within 'unlockedFor', the 'rooms' vector last read by 'unlockedDoors'
+        self.unlockedFor = self.rooms
+
+    @staticmethod
+    def activeFor(room: object):
+        """
+        Returns the world state active within the current thread, if the given room is part of its world; otherwise
+        None.
+
+        :param room: Room object
+        :return: WorldState
+        """
+
+        world = getattr(active, "world", None)
+        index = room.worldIndex
+        if world is None or index is None or index >= len(world.worldRooms) or world.worldRooms[index] is not room:
+            return None
+        return world
+
+    @contextmanager
+    def activate(self):
+        """Makes this the active world state within the current thread, until the 'with' block is left."""
+
+        previous = getattr(active, "world", None)
+        active.world = self
+        try:
+            yield self
+        finally:
+            active.world = previous
+
+    def room(self, index: int) -> RoomState:
+        """
+        Returns the state of the given room: as changed by this game, or as the room began.
+
+        :param index: int
+        :return: RoomState
+        """
+
+        state = self.rooms.get(index)
+        if state is None:
+            room = self.worldRooms[index]
+            return RoomState(room._items, room._locks)
+        return state
+
+    def unlockedDoors(self) -> tuple:
+        """
+        Returns every door this game has unlocked, as (room number, direction) pairs: those locked as their room began,
+        but not within this game's state. These are found again only once the rooms' state has changed since last
+        asked, as every route asks for them (see Routing module), and take time in proportion to the rooms changed.
+
+        :return: tuple
+        """
+
+        if self.unlockedFor is not self.rooms:
+            unlocked = []
+            for index in sorted(self.changed):
+                state = self.rooms.get(index)
+                if state is not None:
+                    began = self.worldRooms[index]._locks
+                    unlocked.extend((index, direction) for direction in sorted(began - state.locks))
+            self.unlocked, self.unlockedFor = tuple(unlocked), self.rooms
+        return self.unlocked
+
+    def update(self, index: int, **changes):
+        """
+        Replaces the given attributes ('items' and/or 'locks') of a room's state.
+
+        :param index: int
+        """
+
+        self.rooms = self.rooms.set(index, self.room(index)._replace(**changes))
+        self.changed.add(index)
+
+
+active = threading.local()  # Holds the world state active within each thread, see 'WorldState.activate'
@@ -0,0 +1,233 @@
+import hashlib
+import io
+import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+from PIL import Image, features
+from Metrics import registry
+
+
+class ImageService:
+    """
+    Prepares room images for remote players (see Server module), who should not each be sent the original files of
+    several hundred kilobytes. Every image is offered in a few variants:
+
+        - 'thumb': at most 120x100, keeping its proportions, e.g. for a map of visited rooms.
+        - 'frame': exactly 350x300, as displayed by the GUI's image frame (see GUI module.)
+        - 'full': its original size, but re-encoded.
+
+    Variants are encoded as WEBP where Pillow supports it and the client accepts it, otherwise as JPEG. Each is
+    encoded only once: it is saved within 'cacheDir' under the SHA-256 hash of the original file's content, so that
+    an image changed on disk is encoded afresh while an unchanged one never is, even after a restart. The same hash
+    is sent as the variant's ETag, so that a client already holding it is answered '304 Not Modified' with no body.
+
+    Requests are served by a thread each. A variant requested by several threads at once is encoded by the first of
+    these while the rest wait upon it (see 'encodeLock'), but different variants are encoded side by side, and
+    requests for those already cached never wait at all.
+    """
+
+    VARIANTS = {  # Contains (variant, (width, height, whether cropped to exactly that size, quality)) pairs
+        "thumb": (120, 100, False, 60),
+        "frame": (350, 300, True, 80),
+        "full": (None, None, False, 85),
+    }
+    FORMATS = {"WEBP": ("image/webp", ".webp"), "JPEG": ("image/jpeg", ".jpg")}
+
+    def __init__(self, imageDir=None, cacheDir="imagecache"):
+        """
+        Initialises the service, creating 'cacheDir' if it does not already exist. Images are served from 'imageDir', by
+        default the 'images' directory beside this module (as room images are found by Game's 'resolvePath' method.)
+
+        :param imageDir: str
+        :param cacheDir: str
+        """
+
+        self.imageDir = imageDir if imageDir is not None else os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                           "images")
+        self.cacheDir = cacheDir
+        self.formats = [form for form in self.FORMATS if form != "WEBP" or features.check("webp")]
+        self.hashes = {}  # Contains (path, (modified time, size, hash)) pairs, so unchanged files are not re-read
+        self.encodeLocks = {}             # Contains (cache path, [lock, threads using it]) pairs, see 'encodeLock'
+        self.encodeLocksLock = threading.Lock()  # Held only while 'encodeLocks' is changed, never while encoding
+        os.makedirs(cacheDir, exist_ok=True)
+
+    def contentHash(self, path: str) -> str:
+        """
+        Returns the SHA-256 hash of a file's content, only reading the file if changed since last hashed.
+
+        :param path: str
+        :return: str
+        """
+
+        status = os.stat(path)
+        known = self.hashes.get(path)
+        if known is not None and known[:2] == (status.st_mtime_ns, status.st_size):
+            return known[2]
+        with open(path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        self.hashes[path] = (status.st_mtime_ns, status.st_size, digest)
+        return digest
+
+    def chooseFormat(self, accept="") -> str:
+        """
+        Returns the best format both supported and accepted by a client, given its 'Accept' header.
+
+        :param accept: str
+        :return: str
+        """
+
+        for form in self.formats:
+            if form == "JPEG" or self.FORMATS[form][0] in accept:
+                return form
+        return "JPEG"
+
+    def etag(self, path: str, variant="frame", form="JPEG") -> str:
+        """
+        Returns the ETag of a variant of the image at 'path', which also names it within the cache. Raises KeyError for
+        unknown variants, and OSError for missing images.
+
+        :param path: str
+        :param variant: str
+        :param form: str
+        :return: str
+        """
+
+        if variant not in self.VARIANTS:
+            raise KeyError(variant)
+        return "%s-%s-%s" % (self.contentHash(path)[:32], variant, form.lower())
+
+    def variant(self, path: str, variant="frame", form="JPEG"):
+        """
+        Returns the (ETag, content type, content) of a variant of the image at 'path', encoding it only if not already
+        within the cache.
+
+        :param path: str
+        :param variant: str
+        :param form: str
+        :return: tuple
+        """
+
+        contentType, extension = self.FORMATS[form]
+        etag = self.etag(path, variant, form)
+        cachePath = os.path.join(self.cacheDir, etag + extension)
+        result = "cached"
+        if not os.path.exists(cachePath):
+            with self.encodeLock(cachePath):
+                if not os.path.exists(cachePath):          # May have been encoded by another thread meanwhile
+                    temporaryPath = cachePath + ".tmp"
+                    with open(temporaryPath, "wb") as file:
+                        file.write(self.encode(path, variant, form))
+                    os.replace(temporaryPath, cachePath)  # Never leaves a partly written variant within the cache
+                    result = "encoded"
+        registry.increment("ptp_image_requests_total", variant, result)
+
+        with open(cachePath, "rb") as file:
+            return etag, contentType, file.read()
+
+    @contextmanager
+    def encodeLock(self, cachePath: str):
+        """
+        Holds the lock of a single variant (named by its path within the cache) for the 'with' block, so that it is
+        encoded once however many threads request it together. Each lock is dropped once no thread is using it.
+
+        :param cachePath: str
+        """
+
+        with self.encodeLocksLock:
+            entry = self.encodeLocks.setdefault(cachePath, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.encodeLocksLock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self.encodeLocks[cachePath]
+
+    def encode(self, path: str, variant: str, form: str) -> bytes:
+        """
+        Resizes and encodes a variant of an image.
+
+        :param path: str
+        :param variant: str
+        :param form: str
+        :return: bytes
+        """
+
+        width, height, cropped, quality = self.VARIANTS[variant]
+        with Image.open(path) as image:
+            image = image.convert("RGBA" if form == "WEBP" and "A" in image.getbands() else "RGB")
+            if cropped:                                     # Resized as GUI displays it
+                image = image.resize((width, height), Image.LANCZOS)
+            elif width is not None:
+                image.thumbnail((width, height), Image.LANCZOS)
+            output = io.BytesIO()
+            image.save(output, form, quality=quality, **({"method": 4} if form == "WEBP" else {"optimize": True}))
+        return output.getvalue()
+
+    def url(self, roomImg: str, variant="frame") -> str:
+        """
+        Returns the path at which 'serve' offers a variant of a room's image (i.e. its 'roomImg' attribute.)
+
+        :param roomImg: str
+        :param variant: str
+        :return: str
+        """
+
+        return "/images/%s/%s" % (variant, quote(os.path.basename(roomImg)))
+
+    def serve(self, port=8080, host="127.0.0.1"):
+        """
+        Serves every image within 'imageDir' at 'http://host:port/images/VARIANT/FILE' from a background thread,
+        returning the server so that it may later be shut down. Only listens on localhost by default.
+
+        :param port: int
+        :param host: str
+        :return: ThreadingHTTPServer
+        """
+
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.split("?")[0].split("/")
+                if len(parts) != 4 or parts[1] != "images" or parts[2] not in service.VARIANTS:
+                    self.send_error(404)
+                    return
+                name = os.path.basename(unquote(parts[3]))  # Only files directly within 'imageDir' may be served
+                path = os.path.join(service.imageDir, name)
+                form = service.chooseFormat(self.headers.get("Accept", ""))
+                try:
+                    etag = '"%s"' % service.etag(path, parts[2], form)
+                    if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+                        registry.increment("ptp_image_requests_total", parts[2], "not_modified")
+                        self.send_response(304)                # Client's copy is current, so neither read nor sent
+                        self.sendCacheHeaders(etag)
+                        self.end_headers()
+                        return
+                    _, contentType, content = service.variant(path, parts[2], form)
+                except OSError:
+                    self.send_error(404)
+                    return
+
+                self.send_response(200)
+                self.sendCacheHeaders(etag)
+                self.send_header("Content-Type", contentType)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def sendCacheHeaders(self, etag):
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "public, max-age=86400")
+                self.send_header("Vary", "Accept")  # Format depends upon the client's 'Accept' header
+
+            def log_message(self, *args):
+                pass  # Requested upon every room entered, and would otherwise fill the game's output
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
@@ -0,0 +1,112 @@
+import heapq
+import json
+import os
+import time
+
+
+class Leaderboard:
+    """
+    Records every winning run of a game - the time taken between the player's first command and reaching the exit
+    room, and the number of doors passed through on the way - and ranks the best of these for each world (i.e. game
+    title) by each category: 'moves' (fewest doors) and 'time' (fastest).
+
+    A move is counted for each door passed, however it was reached: 'GOTO' counts every door along its route, while
+    commands which pass no door (e.g. 'INSPECT', 'UNDO' or invalid input) count nothing. 'UNDO' does not take back
+    the moves it undoes, so a run may not be shortened by undoing part of it.
+
+    Every run is appended to a file, one JSON object per line, which is never rewritten; upon being instanced, the
+    leaderboard reads this file back. Only the best 'size' runs of each world and category are held in memory, within a
+    heap whose root is the worst of these, so that recording a run takes O(log size) however many have been recorded,
+    and listing the best runs never requires sorting them all.
+    """
+
+    CATEGORIES = {"moves": "moves", "time": "seconds"}  # Contains (category, run attribute ranked by) pairs
+
+    def __init__(self, path="leaderboard.jsonl", size=100):
+        """
+        Initialises the leaderboard, loading every run already recorded within 'path'.
+
+        :param path: str
+        :param size: int
+        """
+
+        self.path = path
+        self.size = size
+        self.heaps = {}  # Contains ((world, category), heap) pairs
+        self.count = 0   # Number of runs recorded, used to rank equal scores by which came first
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        self.rank(json.loads(line))
+
+    def record(self, world: str, player: str, seconds: float, moves: int) -> dict:
+        """
+        Records a winning run, returning its placing within each category, or None for any in which it did not place.
+
+        :param world: str
+        :param player: str
+        :param seconds: float
+        :param moves: int
+        :return: dict
+        """
+
+        run = {"world": world, "player": player, "seconds": round(seconds, 3), "moves": moves, "date": time.time()}
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(run) + "\n")
+        number = self.rank(run)
+
+        placings = {}
+        for category in self.CATEGORIES:
+            best = self.top(world, category, self.size)
+            placings[category] = next((place for place, (entryNumber, _) in enumerate(best, 1)
+                                       if entryNumber == number), None)
+        return placings
+
+    def rank(self, run: dict) -> int:
+        """
+        Adds a run to the heap of each category, if among the best. Heap entries are ordered by (-score, -number), so
+        that the root is the worst run held: the highest score, or the latest of equal scores.
+
+        :param run: dict
+        :return: int
+        """
+
+        self.count += 1
+        for category, attribute in self.CATEGORIES.items():
+            heap = self.heaps.setdefault((run["world"], category), [])
+            entry = (-run[attribute], -self.count, run)
+            if len(heap) < self.size:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:                      # Better than the worst held, which it replaces
+                heapq.heapreplace(heap, entry)
+        return self.count
+
+    def top(self, world: str, category: str, count=10) -> list:
+        """
+        Returns up to 'count' of the best runs of a world within a category, best first, each as a (number, run) pair.
+
+        :param world: str
+        :param category: str
+        :param count: int
+        :return: list
+        """
+
+        if category not in self.CATEGORIES:
+            raise ValueError("Category must be one of %s." % list(self.CATEGORIES))
+        best = heapq.nlargest(count, self.heaps.get((world, category), []))
+        return [(-number, run) for _, number, run in best]
+
+    def show(self, world: str, category: str, count=10):
+        """
+        Prints the best runs of a world within a category.
+
+        :param world: str
+        :param category: str
+        :param count: int
+        """
+
+        print("[%s - %s:]" % (world, "Fewest moves" if category == "moves" else "Fastest time"))
+        for place, (_, run) in enumerate(self.top(world, category, count), 1):
+            print("%3d. %-20s %4d moves %8.1fs" % (place, run["player"], run["moves"], run["seconds"]))
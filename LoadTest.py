@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from Leaderboard import Leaderboard
+from MemoryReport import MemoryReport
+from Server import Server
+from Sessions import SessionStore
+
+
+class LoadTest:
+    """
+    Simulates many players at once against a running game server (see Server module), each connecting and sending a
+    random mix of commands with a pause - 'thinkTime' - between each, as a real player would. Every command's response
+    time is recorded under the whole command sent, answers included, so that 'report' may present the throughput and
+    the 50th, 99th and 99.9th percentile response times of each (e.g. storing items apart from taking them.)
+
+    The default command mix is drawn from "The Mysterious Mansion", the default game of 'Game.createRooms', so that
+    results stay comparable across releases. Players who escape (or are disconnected) reconnect as a new player.
+    """
+
+    # Contains (command, weight) pairs; any ';'-separated segments answer the questions the command asks (see Server).
+    COMMAND_MIX = {
+        "GO EAST": 8, "GO WEST": 8, "GO NORTH": 6, "GO SOUTH": 6, "GO UPSTAIRS": 5, "GO DOWNSTAIRS": 5,
+        "GO LADDER": 2, "GO HATCH": 2, "GO UP": 1,
+        "INSPECT": 20,
+        "HINT": 10,
+        "INVENTORY": 5,
+        "INTERACT;TAKE": 12,
+        "INTERACT;OPEN;STORE;1;CLOSE": 5,
+        "INTERACT;OPEN;RETRIEVE;1;CLOSE": 5,
+    }
+
+    def __init__(self, players=1000, duration=30.0, thinkTime=0.5, host="127.0.0.1", port=4000, mix=None):
+        """
+        Initialises the test. 'thinkTime' is the mean pause, in seconds, between a player's commands.
+
+        :param players: int
+        :param duration: float
+        :param thinkTime: float
+        :param host: str
+        :param port: int
+        :param mix: dict
+        """
+
+        self.players = players
+        self.duration = duration
+        self.thinkTime = thinkTime
+        self.host = host
+        self.port = port
+        self.mix = mix if mix is not None else self.COMMAND_MIX
+
+        self.latencies = defaultdict(list)  # Contains (command, [response times]) pairs
+        self.errors = 0
+        self.elapsed = 0.0
+
+    async def connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=2 ** 20)
+        await reader.readuntil(Server.PROMPT.encode())  # Skips introduction
+        return reader, writer
+
+    async def player(self, deadline: float):
+        """
+        Plays as a single player until the deadline, sending commands chosen at random from the mix.
+
+        :param deadline: float
+        """
+
+        commands, weights = list(self.mix), list(self.mix.values())
+        await asyncio.sleep(random.random() * self.thinkTime)  # Staggers connections
+        writer = None
+        try:
+            reader, writer = await self.connect()
+            while time.monotonic() < deadline:
+                await asyncio.sleep(random.expovariate(1 / self.thinkTime) if self.thinkTime > 0 else 0)
+                command = random.choices(commands, weights)[0]
+                start = time.perf_counter()
+                writer.write(command.encode() + b"\n")
+                try:
+                    await reader.readuntil(Server.PROMPT.encode())
+                except (asyncio.IncompleteReadError, ConnectionError):  # Player escaped or was disconnected
+                    writer.close()
+                    reader, writer = await self.connect()
+                    continue
+                self.latencies[command].append(time.perf_counter() - start)
+        except (OSError, asyncio.LimitOverrunError):
+            self.errors += 1
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def run(self):
+        """Runs every player concurrently for the test's duration."""
+
+        start = time.monotonic()
+        deadline = start + self.duration
+        await asyncio.gather(*(self.player(deadline) for _ in range(self.players)))
+        self.elapsed = time.monotonic() - start
+
+    @staticmethod
+    def percentile(ordered: list, fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def report(self) -> str:
+        """
+        Returns a table of each command's throughput and response times, in milliseconds.
+
+        :return: str
+        """
+
+        width = max([len("COMMAND")] + [len(command) for command in self.latencies])
+        lines = ["%-*s %9s %9s %9s %9s %9s" % (width, "COMMAND", "COUNT", "PER SEC", "P50 ms", "P99 ms", "P99.9 ms")]
+        total = 0
+        for command in sorted(self.latencies):
+            ordered = sorted(self.latencies[command])
+            total += len(ordered)
+            lines.append("%-*s %9d %9.1f %9.2f %9.2f %9.2f" % (
+                width, command, len(ordered), len(ordered) / self.elapsed,
+                *(self.percentile(ordered, fraction) * 1000 for fraction in (0.5, 0.99, 0.999))
+            ))
+        lines.append("%d players, %d commands in %.1fs (%.1f per sec), %d connection errors." % (
+            self.players, total, self.elapsed, total / self.elapsed if self.elapsed else 0, self.errors
+        ))
+        return "\n".join(lines)
+
+
+def main():
+    """Runs a load test against a server, or against one started within this process if '--local' is given."""
+
+    parser = argparse.ArgumentParser(description="Simulates many concurrent players against the game server.")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean pause between commands, in seconds")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--local", action="store_true", help="start a server within this process to test against")
+    parser.add_argument("--memory", action="store_true", help="report memory held by the local server's sessions")
+    args = parser.parse_args()
+
+    test = LoadTest(args.players, args.duration, args.think_time, args.host, args.port)
+
+    server = scratch = None
+    if args.local:  # Test players' spilled sessions and winning runs are kept apart from those of real players
+        scratch = tempfile.mkdtemp(prefix="loadtest-")
+        store = SessionStore(spillDir=os.path.join(scratch, "sessions"),
+                             leaderboard=Leaderboard(os.path.join(scratch, "leaderboard.jsonl")))
+        server = Server(store, host=args.host, port=args.port)
+
+    async def run():
+        task = None
+        if server is not None:
+            task = asyncio.ensure_future(server.serve())
+            await asyncio.sleep(0.1)
+        try:
+            if args.memory and server is not None:       # Reported while every player remains connected
+                await asyncio.gather(test.run(), report(test.duration * 0.9))
+            else:
+                await test.run()
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def report(delay: float):
+        await asyncio.sleep(delay)
+        print(MemoryReport(server.store).render())
+
+    try:
+        asyncio.run(run())
+    finally:
+        if scratch is not None:
+            shutil.rmtree(scratch, ignore_errors=True)
+    print(test.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import argparse
+import gc
+import os
+import signal
+import sys
+import tempfile
+import threading
+import tracemalloc
+import types
+from Console import Console
+from Leaderboard import Leaderboard
+from Metrics import registry
+from Sessions import SessionStore
+
+
+class MemoryReport:
+    """
+    Accounts for the memory held by a session store (see Sessions module): the bytes retained by each resident session
+    alone, those retained by each world template held by the store or its catalog (see Catalog module), and those
+    shared between several of these. Sizes are found by walking the object graph through 'gc.get_referents', summing
+    'sys.getsizeof' of every object reached; classes, modules and functions are the program rather than its data, and
+    so are not walked into. Worlds are walked first, and each session's walk then stops at the objects of its world
+    (e.g. its rooms), so that a report takes time in proportion to the sessions' own objects and each world's size,
+    rather than to the size of the world for every session.
+
+    Where 'tracemalloc' is tracing, reports also list the lines of code holding the most memory. 'leakCheck' instead
+    compares tracemalloc snapshots taken before and after many sessions are created and closed, flagging every line of
+    code which retained memory for each of these.
+
+    A report may be requested of a running server by sending it SIGUSR1, or from '/debug/memory' on its metrics server
+    (see 'install').
+    """
+
+    CODE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+                  types.CodeType)
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    @classmethod
+    def walk(cls, root, known=frozenset()) -> dict:
+        """
+        Returns every object reachable from 'root', other than through those whose ids are within 'known', as an
+        (object id, (object, bytes)) dictionary. Objects are kept, so that no id is reused while walking.
+
+        :param root: object
+        :param known: set
+        :return: dict
+        """
+
+        reached = {}
+        pending = [root]
+        while pending:
+            item = pending.pop()
+            if id(item) in reached or id(item) in known or isinstance(item, cls.CODE_TYPES):
+                continue
+            reached[id(item)] = (item, sys.getsizeof(item))
+            pending.extend(gc.get_referents(item))
+        return reached
+
+    def measure(self) -> tuple:
+        """
+        Returns the bytes retained by each resident session alone, as a (sessionId, bytes) dictionary, those retained by
+        each world template alone, as a (world, bytes) dictionary, and those shared between any of these.
+
+        :return: tuple
+        """
+
+        with Console.lock:  # Sessions are only changed while a console is open, so are listed while none is
+            sessions = dict(self.store.resident)
+            worlds = {title: template for title, (template, _) in self.store.catalog.worlds.items()}
+            version, template = self.store.release
+            if all(template is not other for other in worlds.values()):  # Reloaded, or played upon a world image
+                worlds["release %d" % version] = template
+            worlds["catalog assets"] = self.store.catalog.assets
+
+        # Walked once the lock is released, so that play carries on meanwhile; a session changed while being walked is
+        # measured as it is found, which is close enough for a report.
+        owners = {}  # Contains (object id, owner) pairs, the owner being None once reached from more than one
+        reached = {}
+
+        def account(owner, found: dict):
+            for objectId, entry in found.items():
+                reached[objectId] = entry
+                owners[objectId] = owner if owners.get(objectId, owner) == owner else None
+
+        for world, root in worlds.items():
+            account(world, self.walk(root))
+        worldObjects = set(reached)
+        for sessionId, session in sessions.items():
+            account(sessionId, self.walk(session, worldObjects))
+        sizes = {objectId: size for objectId, (_, size) in reached.items()}
+
+        retained = dict.fromkeys(list(sessions) + list(worlds), 0)
+        shared = 0
+        for objectId, owner in owners.items():
+            if owner is None:
+                shared += sizes[objectId]
+            else:
+                retained[owner] += sizes[objectId]
+        return {sessionId: retained[sessionId] for sessionId in sessions}, \
+            {world: retained[world] for world in worlds}, shared
+
+    @staticmethod
+    def formatBytes(size: float) -> str:
+        for unit in ("B", "KiB", "MiB"):
+            if abs(size) < 1024:
+                return "%.1f %s" % (size, unit)
+            size /= 1024
+        return "%.1f GiB" % size
+
+    def render(self, limit=5) -> str:
+        """
+        Returns a report of the memory held by the store, listing the 'limit' largest sessions and, if tracing, lines of
+        code.
+
+        :param limit: int
+        :return: str
+        """
+
+        sessions, worlds, shared = self.measure()
+        lines = ["[Memory report - %d sessions resident, %d spilled to disk.]"
+                 % (len(sessions), len(self.store.spilled))]
+        if sessions:
+            total = sum(sessions.values())
+            lines.append("Sessions: %s in total, %s each on average, %s at most."
+                         % (self.formatBytes(total), self.formatBytes(total / len(sessions)),
+                            self.formatBytes(max(sessions.values()))))
+        for world, size in worlds.items():
+            lines.append("World '%s': %s." % (world, self.formatBytes(size)))
+        lines.append("Shared between sessions and worlds: %s." % self.formatBytes(shared))
+
+        if sessions:
+            lines.append("Largest sessions:")
+            for sessionId, size in sorted(sessions.items(), key=lambda pair: pair[1], reverse=True)[:limit]:
+                session = self.store.resident.get(sessionId)
+                if session is None:  # Spilled or closed since measured
+                    lines.append("  %-10s %12s" % (sessionId, self.formatBytes(size)))
+                    continue
+                lines.append("  %-10s %12s  (%d states of history, %d macros)" % (
+                    sessionId, self.formatBytes(size), len(session.game.history), len(session.game.macros)))
+
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append("Traced: %s current, %s peak. Lines of code holding the most:"
+                         % (self.formatBytes(current), self.formatBytes(peak)))
+            for statistic in tracemalloc.take_snapshot().statistics("lineno")[:limit]:
+                frame = statistic.traceback[0]
+                lines.append("  %s:%d  %s in %d blocks" % (os.path.basename(frame.filename), frame.lineno,
+                                                         self.formatBytes(statistic.size), statistic.count))
+        return "\n".join(lines) + "\n"
+
+    def install(self, trace=False):
+        """
+        Makes reports available from a running process: at '/debug/memory' of the metrics server (see Metrics module),
+        and printed to standard error upon receiving SIGUSR1 (where supported.) If 'trace' is True, tracemalloc is
+        started also, so that reports list lines of code; this slows the whole process, so is off by default.
+
+        :param trace: bool
+        """
+
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        registry.addPage("/debug/memory", self.render)
+        if hasattr(signal, "SIGUSR1") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda signalNumber, frame: print(self.render(), file=sys.stderr))
+
+    @staticmethod
+    def leakCheck(cycles=200, commands=("INTERACT;TAKE", "GO EAST", "INSPECT", "UNDO", "GO WEST")) -> list:
+        """
+        Creates a session within a new store, runs 'commands' upon it and closes it, 'cycles' times over, then returns
+        every line of code which retained a block of memory for each cycle, as (location, bytes, blocks) tuples. Memory
+        is compared between tracemalloc snapshots taken before and after, once caches have been filled by a first few
+        cycles.
+
+        :param cycles: int
+        :param commands: tuple
+        :return: list
+        """
+
+        with tempfile.TemporaryDirectory() as spillDir:
+            leaderboard = Leaderboard(os.path.join(spillDir, "leaderboard.jsonl"))
+            store = SessionStore(spillDir=spillDir, leaderboard=leaderboard)
+
+            def cycle():
+                sessionId = store.createSession().sessionId
+                for command in commands:
+                    store.runCommand(sessionId, command)
+                store.closeSession(sessionId)
+
+            for _ in range(20):
+                cycle()
+
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            gc.collect()
+            before = tracemalloc.take_snapshot()
+            for _ in range(cycles):
+                cycle()
+            gc.collect()
+            after = tracemalloc.take_snapshot()
+            if not tracing:
+                tracemalloc.stop()
+
+        ignored = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>")]
+        differences = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+        return [("%s:%d" % (os.path.basename(difference.traceback[0].filename), difference.traceback[0].lineno),
+                 difference.size_diff, difference.count_diff)
+                for difference in differences if difference.count_diff >= cycles]
+
+
+def main():
+    """
+    Reports the memory held by a store of sessions, then checks for leaks; exits with status 1 if any are found, so
+    that it may be run alongside other benchmarks.
+    """
+
+    parser = argparse.ArgumentParser(description="Reports memory held by game sessions and checks for leaks.")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions to create and report upon")
+    parser.add_argument("--cycles", type=int, default=200, help="sessions to create and close when checking for leaks")
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as spillDir:
+        store = SessionStore(spillDir=spillDir, leaderboard=Leaderboard(os.path.join(spillDir, "leaderboard.jsonl")))
+        for _ in range(args.sessions):
+            store.runCommand(store.createSession().sessionId, "INTERACT;TAKE;GO EAST;INSPECT")
+        print(MemoryReport(store).render())
+    tracemalloc.stop()
+
+    leaks = MemoryReport.leakCheck(args.cycles)
+    if not leaks:
+        print("[No memory retained across %d sessions created and closed.]" % args.cycles)
+        return
+    print("[Memory retained across %d sessions created and closed, by line:]" % args.cycles)
+    for location, size, count in leaks:
+        print("  %-24s +%s in %+d blocks" % (location, MemoryReport.formatBytes(size), count))
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Registry:
+    """
+    Collects counts of what players do - commands run, inputs rejected, locked doors bounced off, rooms visited - and
+    presents them in the Prometheus text format for any monitoring tool to scrape (see 'serve').
+
+    Counting is done upon the game's command path, and so is kept as cheap as possible: every thread counts into its
+    own dictionary (a 'shard'), which no other thread ever writes to, so that no lock is taken. Only when the metrics
+    are collected by 'render' are all shards summed together. Once a thread exits, its shard is folded into 'retired'
+    and dropped, so that threads started for a single task (e.g. each request of a ThreadingHTTPServer) may count
+    through 'increment' without shards accumulating.
+
+    Gauges, i.e. values measured at collection time rather than counted (e.g. active sessions), are registered through
+    'setGauge' as functions returning their current values.
+    """
+
+    def __init__(self):
+        """
+        Initialises the registry, listing every counter and gauge it may present. Each definition takes the form
+        name: (type, help text, label names).
+        """
+
+        self.definitions = {
+            "ptp_sessions_total": ("counter", "Sessions created.", ()),
+            "ptp_sessions_active": ("gauge", "Sessions currently held, in memory or spilled to disk.", ()),
+            "ptp_sessions_resident": ("gauge", "Sessions currently held in memory.", ()),
+            "ptp_session_spill_failures_total": ("counter", "Sessions which could not be spilled, and so were kept in "
+                                                            "memory.", ()),
+            "ptp_commands_total": ("counter", "Commands run, by action word.", ("action",)),
+            "ptp_rejected_inputs_total": ("counter", "Inputs rejected, by reason.", ("reason",)),
+            "ptp_locked_door_bounces_total": ("counter", "Attempts to pass a locked door without its key.", ("room",)),
+            "ptp_room_visits_total": ("counter", "Times each room has been entered.", ("room",)),
+            "ptp_room_occupancy": ("gauge", "Sessions currently in each room.", ("room",)),
+            "ptp_image_requests_total": ("counter", "Room image variants requested, by variant and whether encoded, "
+                                                    "read from cache or not modified.", ("variant", "result")),
+        }
+
+        self.shards = {}                    # Contains (id, shard) pairs for every live thread, each shard being a
+                                            # ((name, labels), count) dictionary
+        self.retired = {}                   # Counts of every exited thread's shard, summed as a single shard
+        self.shardLock = threading.RLock()  # Only taken when a thread first counts or exits, and by 'collect'
+        self.local = threading.local()
+        self.gauges = {}
+        self.pages = {}                     # Contains (path, function returning text) pairs, served alongside metrics
+
+    def increment(self, name: str, *labels: str, amount=1):
+        """
+        Adds 'amount' to the counter with the given name and label values, within the calling thread's own shard.
+
+        :param name: str
+        :param labels: str
+        :param amount: int
+        """
+
+        try:
+            shard = self.local.shard
+        except AttributeError:            # First count made by this thread, so its shard is created
+            shard = self.local.shard = {}
+            with self.shardLock:
+                self.shards[id(shard)] = shard
+            # Thread-local values are released when their thread exits, upon which this owner's finalizer retires
+            # the shard; the owner alone is referenced by the finalizer weakly, the shard strongly
+            owner = self.local.owner = ShardOwner()
+            weakref.finalize(owner, self.retire, shard)
+
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def retire(self, shard: dict):
+        """
+        Folds the shard of an exited thread into 'retired', then drops it.
+
+        :param shard: dict
+        """
+
+        with self.shardLock:
+            for key, count in shard.items():
+                self.retired[key] = self.retired.get(key, 0) + count
+            del self.shards[id(shard)]
+
+    def setGauge(self, name: str, measure):
+        """
+        Registers the function which measures a gauge. It should return a dictionary of (label values tuple, value)
+        pairs, the tuple being empty for gauges without labels.
+
+        :param name: str
+        :param measure: function
+        """
+
+        self.gauges[name] = measure
+
+    def addPage(self, path: str, render):
+        """
+        Registers a further plain text page for 'serve' to offer at the given path (e.g. '/debug/memory'), its text
+        returned by 'render' upon every request.
+
+        :param path: str
+        :param render: function
+        """
+
+        self.pages[path] = render
+
+    def collect(self) -> dict:
+        """
+        Sums every shard and measures every gauge, returning a (name, {labels: value}) dictionary.
+
+        :return: dict
+        """
+
+        with self.shardLock:
+            shards = [dict(self.retired)] + list(self.shards.values())
+
+        values = {name: {} for name in self.definitions}
+        for shard in shards:
+            for (name, labels), count in shard.copy().items():  # Copy taken in one step, as its thread may still write
+                values[name][labels] = values[name].get(labels, 0) + count
+
+        for name, measure in self.gauges.items():
+            values[name] = dict(measure())
+
+        return values
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format.
+
+        :return: str
+        """
+
+        lines = []
+        for name, series in self.collect().items():
+            metricType, helpText, labelNames = self.definitions[name]
+            lines.append("# HELP %s %s" % (name, helpText))
+            lines.append("# TYPE %s %s" % (name, metricType))
+            for labels, value in sorted(series.items()):
+                if labels:
+                    pairs = ",".join('%s="%s"' % (labelName, self.escape(label))
+                                     for labelName, label in zip(labelNames, labels))
+                    lines.append("%s{%s} %s" % (name, pairs, value))
+                else:
+                    lines.append("%s %s" % (name, value))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def escape(label: str) -> str:
+        return str(label).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+    def serve(self, port=9100, host="127.0.0.1"):
+        """
+        Serves the metrics at 'http://host:port/metrics', along with any page added by 'addPage', from a background
+        thread, returning the server so that it may later be shut down. Only listens on localhost by default.
+
+        :param port: int
+        :param host: str
+        :return: ThreadingHTTPServer
+        """
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body, contentType = registry.render(), "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path in registry.pages:
+                    body, contentType = registry.pages[self.path](), "text/plain; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                body = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", contentType)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes are frequent and would otherwise fill the game's output
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class ShardOwner:
+    """Held within a thread's local values alongside its shard, to learn through a finalizer when the thread exits."""
+
+
+registry = Registry()  # Shared by every module, so that all counts are presented together
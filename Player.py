@@ -1,8 +1,9 @@
 class Player:
     """
     This class serves to handle any aspects of player's interaction with the game elements. Upon being initialised,
-    the player is assigned inventory and storage attributes, these both being empty lists to track and items found and
-    where they are stored.
+    the player is assigned inventory and storage attributes, these both being empty tuples to track and items found and
+    where they are stored. (These are replaced rather than changed in place, so that earlier states may be kept for
+    the 'UNDO' action.)
     The 'collectItem' method handles collection of item from rooms, while 'checkInventory' and 'checkStorage' inform
     the player what condition their inventory or storage is in, respectively.
     'storeItem' and 'retrieveItem' act as storing and retrieving gameplay loops, resp., if necessary conditions are met
@@ -11,11 +12,11 @@ class Player:
 
     def __init__(self):
         """
-        Initialises the class, setting the player's inventory and storage as empty lists for later use.
+        Initialises the class, setting the player's inventory and storage as empty tuples for later use.
         """
 
-        self.inventory = []
-        self.storageBox = []
+        self.inventory = ()
+        self.storageBox = ()
 
     def collectItem(self, item: str, room: object):
         """
@@ -30,20 +31,22 @@ class Player:
             if len(self.inventory) >= 3:
                 print("Inventory full.")
             else:
-                room.items.remove(item)      # Item is removed from room via 'pop()' method and moved
-                self.inventory.append(item)  # to player inventory.
+                room.removeItem(item)                   # Item is removed from room via 'removeItem' method and
+                self.inventory = self.inventory + (item,)  # moved to player inventory.
                 print("Collected %s." % item)
         else:
             print("Item not in room.")
 
-    def storeItem(self, room):
+    def storeItem(self, room, ask=True):
         """
         Handles the storage of items from player's inventory to a room's storage box. Acts further as a nested
         gameplay loop: requests player keyboard input, checks whether input is valid, then either carries out
         command or returns an error message until an input is valid. To avoid an infinite loop, 'PASS' command is
-        included so that the loop can be terminated at any input opportunity.
+        included so that the loop can be terminated at any input opportunity. If 'ask' is False, the player has already
+        been asked (e.g. upon an earlier line, see Game's 'doInteractAction'), and only their answer is awaited.
 
         :param room:
+        :param ask: bool
         """
 
         # First two conditional statements check whether action can be carried out by user, i.e. if there are items to
@@ -53,24 +56,28 @@ class Player:
         if len(self.inventory) == 0:                # Checks whether inventory attribute is empty
             print("You carry nothing to store.\n")  # Informs player of error
             return None
-        if room.roomNo not in room.storageRooms:    # Checks whether room is listed under storageRooms global attribute
+        if not room.storeroom:                      # Checks whether room is a storage room
             print("Room has no storage box.\n")     # informs player of error
             return None
 
         finished = False
-        print("[Enter the index of the item you wish to store, or 'PASS'.]")  # Informs player of valid inputs
-        print("[e.g. For %s, enter '1'.]\n" % self.inventory[0])              # Provides example of valid input
+        if ask:
+            print("[Enter the index of the item you wish to store, or 'PASS'.]")  # Informs player of valid inputs
+            print("[e.g. For %s, enter '1'.]\n" % self.inventory[0])              # Provides example of valid input
 
         # Storing gameplay loop:
         while not finished:
-            self.checkInventory()           # Informs player of inventory status through UI
+            if ask:
+                self.checkInventory()       # Informs player of inventory status through UI
+            ask = True
             interactionInput = input("> ")  # Receives player keyboard input
 
-            if interactionInput.isnumeric():
+            if interactionInput.isdecimal():
                 itemNo = int(interactionInput)
                 if itemNo in range(1, len(self.inventory) + 1):
-                    item = self.inventory.pop(itemNo - 1)  # As with 'collectItem' procedure, item is removed
-                    self.storageBox.append(item)           # from inventory and appended to storageBox list.
+                    item = self.inventory[itemNo - 1]      # As with 'collectItem' procedure, item is removed
+                    self.inventory = self.inventory[:itemNo - 1] + self.inventory[itemNo:]  # from inventory and
+                    self.storageBox = self.storageBox + (item,)                            # added to storageBox.
                     print("%s stored.\n" % item)
                 else:
                     print("Item index out of range. [Enter another or 'PASS'.]\n")
@@ -85,13 +92,14 @@ class Player:
 
             finished = True  # If reached, loop terminates
 
-    def retrieveItem(self, room):
+    def retrieveItem(self, room, ask=True):
         """
         Method has inverse use of 'storeItem', being of identical structure but with reverse effect by moving items
         from storage to player's inventory. The size limit of this is also accounted for, so that no more than 3 items
         can be held by the player at one time.
 
         :param room:
+        :param ask: bool
         """
 
         # First three conditional statements check if action is valid, by assessing existence of retrievable items,
@@ -101,7 +109,7 @@ class Player:
         if len(self.storageBox) == 0:                        # Checks if storage empty
             print("You have nothing stored to retrieve.\n")  # Informs player of error in UI
             return None
-        if room.roomNo not in room.storageRooms:  # Checks if room contains storage box
+        if not room.storeroom:                    # Checks if room contains storage box
             print("Room has no storage box.\n")   # Informs player of error
             return None
         if len(self.inventory) >= 3:                                                 # Checks if inventory full
@@ -110,19 +118,23 @@ class Player:
             return None
 
         finished = False
-        print("[Enter the index of the item you wish to retrieve, or 'PASS'.]")
-        print("[e.g. For %s, enter '1'.]\n" % self.storageBox[0])
+        if ask:
+            print("[Enter the index of the item you wish to retrieve, or 'PASS'.]")
+            print("[e.g. For %s, enter '1'.]\n" % self.storageBox[0])
 
         # Retrieval gameplay loop:
         while not finished:
-            self.checkStorage()             # Informs player of storage status through UI
+            if ask:
+                self.checkStorage()         # Informs player of storage status through UI
+            ask = True
             interactionInput = input("> ")  # Receives player keyboard input
 
-            if interactionInput.isnumeric():
+            if interactionInput.isdecimal():
                 itemNo = int(interactionInput)
                 if itemNo in range(1, len(self.storageBox) + 1):  # Checks if index is valid
-                    item = self.storageBox.pop(itemNo - 1)
-                    self.inventory.append(item)
+                    item = self.storageBox[itemNo - 1]
+                    self.storageBox = self.storageBox[:itemNo - 1] + self.storageBox[itemNo:]
+                    self.inventory = self.inventory + (item,)
                     print("You retrieved %s.\n" % item)
                 else:
                     print("Item index out of range. [Enter another, or 'PASS'.]\n")
@@ -147,7 +159,7 @@ class Player:
             print("Your inventory is empty.")  # Informs player through UI
         else:
             print("You are holding the following items:")  # If not empty, prints list of stored items
-            print(self.inventory)
+            print(list(self.inventory))
 
     def checkStorage(self):
         """
@@ -159,4 +171,4 @@ class Player:
             print("Your storage is empty.\n")  # Informs player through UI
         else:
             print("You have the following items stored:")  # If not empty, prints list of stored items
-            print(self.storageBox)
+            print(list(self.storageBox))
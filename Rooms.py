@@ -1,3 +1,7 @@
+from Metrics import registry
+from History import WorldState
+
+
 class Room:
     """
     This class allows for a room to be instanced with its own unique items, descriptions, features and
@@ -8,14 +12,20 @@ class Room:
     the latter two being optional if the user wishes to provide more narrative-centered detail for the room or
     a hint on how to interact with it (any additional text should be included at the users discretion.)
 
-    The 'storeRoom' option determines whether the player can store items in this room, and must be considered
-    when avoiding soft-locks. The global attributes 'roomNo' and 'storageRooms' allow for unique room numbers to be
-    assigned when an object is instanced and a record of all storage rooms to be kept, while 'allDirections' stores
-    all direction options added by the user - these are used when catching typo errors.
+    The 'storeroom' option determines whether the player can store items in this room, and must be considered
+    when avoiding soft-locks. The global attribute 'roomNo' allows for unique room numbers to be assigned when an
+    object is instanced, while 'allDirections' stores all direction options added by the user - these are used when
+    catching typo errors. (Whether a room is a storage room is kept by the room itself, rather than within a global
+    list, as such a list would grow with every game created.)
+
+    The 'items' and 'locks' attributes are never changed in place, but replaced (as a tuple and frozenset, resp.), so
+    that earlier states of the room may be kept and restored for the 'UNDO' action. Once numbered as part of a world
+    (see Game's 'template' method), a room is shared by every game of that world, and both are held by each game's
+    WorldState (see History module) rather than within the room itself; the room keeps only those it began with, and
+    raises RuntimeError if they are changed while no game of its world is active.
     """
 
     roomNo = 1
-    storageRooms = []
     allDirections = []
 
     def __init__(self, roomImage: str, description: str, wordDescription="", writtenHint="", storeroom=False):
@@ -28,20 +38,76 @@ class Room:
         :param storeroom:
         """
 
-        self.doors = {}  # Contains (direction, room) dictionary pairs for each door and its corresponding room
-        self.locks = {}  # Tracks which doors are locked, from the side of current room to the one connected
-        self.keys = {}   # Tracks the required keys for the above locks
-        self.items = []  # List of all items obtainable from a room
+        self.worldIndex = None    # Position within its world's rooms, once numbered (see Game's 'template' method)
+
+        self.doors = {}           # Contains (direction, room) dictionary pairs for each door and its corresponding room
+        self.locks = frozenset()  # Tracks which doors are locked, from the side of current room to the one connected
+        self.keys = {}            # Tracks the required keys for the above locks
+        self.items = ()           # All items obtainable from a room
 
         self.roomImg = roomImage
         self.description = description
         self.wordDescription = wordDescription
         self.writtenHint = writtenHint
 
+        self.storeroom = storeroom  # If True, room contains a storage box
+
         self.roomNo = Room.roomNo
         Room.roomNo += 1
-        if storeroom:
-            Room.storageRooms.append(self.roomNo)  # If desired, adds room to list of all storage rooms
+
+    @property
+    def items(self) -> tuple:
+        world = WorldState.activeFor(self)
+        if world is None:
+            return self._items
+        return world.room(self.worldIndex).items
+
+    @items.setter
+    def items(self, items: tuple):
+        world = WorldState.activeFor(self)
+        if world is not None:
+            world.update(self.worldIndex, items=tuple(items))
+        elif self.worldIndex is None:
+            self._items = tuple(items)
+        else:
+            self.raiseShared()
+
+    @property
+    def locks(self) -> frozenset:
+        world = WorldState.activeFor(self)
+        if world is None:
+            return self._locks
+        return world.room(self.worldIndex).locks
+
+    @locks.setter
+    def locks(self, locks: frozenset):
+        world = WorldState.activeFor(self)
+        if world is not None:
+            world.update(self.worldIndex, locks=frozenset(locks))
+        elif self.worldIndex is None:
+            self._locks = frozenset(locks)
+        else:
+            self.raiseShared()
+
+    def raiseShared(self):
+        """
+        Raises RuntimeError for an attempt to change the items or locks of a room shared by every game of its world,
+        while no game of that world is active (see 'WorldState.activate'): the change would otherwise be made to every
+        game at once.
+        """
+
+        raise RuntimeError("The %s is shared by every game of its world, so may only be changed by a game while its "
+                           "world state is active." % self.description)
+
+    def removeItem(self, item: str):
+        """
+        Removes the first of the given item from the room.
+
+        :param item: str
+        """
+
+        index = self.items.index(item)
+        self.items = self.items[:index] + self.items[index + 1:]
 
     def addItems(self, *allItems: str):
         """
@@ -51,7 +117,7 @@ class Room:
         :param allItems: str
         """
 
-        self.items.extend([item for item in allItems])
+        self.items = self.items + allItems
 
     def getInfo(self):
         """
@@ -93,10 +159,10 @@ class Room:
         self.doors[direction] = connectedRoom
 
         if locked:
-            self.locks[direction] = connectedRoom  # (direction, connectedRoom) pairing is added to 'locks' attribute
+            self.locks = self.locks | {direction}  # Direction is added to 'locks' attribute
             self.keys[direction] = connectedRoom.description + " key"  # Creates key for lock and adds to 'keys'
             if keyRoom is not None:
-                keyRoom.items.append(self.keys[direction])  # If desired, adds the key to a specified room, 'keyRoom'
+                keyRoom.addItems(self.keys[direction])  # If desired, adds the key to a specified room, 'keyRoom'
 
     def unlockDoor(self, direction: str, player: object) -> bool:
         """
@@ -113,15 +179,17 @@ class Room:
         """
 
         if self.keys[direction] in player.inventory:
-            del self.locks[direction]     # Lock is removed so that player can access room and key no longer needed
-            player.inventory.remove(self.keys[direction])
-            player.inventory.append(self.keys[direction] + " (used)")
+            self.locks = self.locks - {direction}  # Lock is removed so player can access room, key no longer needed
+            index = player.inventory.index(self.keys[direction])
+            player.inventory = player.inventory[:index] + (self.keys[direction] + " (used)",) + \
+                player.inventory[index + 1:]
             # String corresponding to door key is extended with the string ' (used)' for better player quality-of-life.
             # This also corrects for possible UI errors when player calls 'HINT' action, as now the original key string
             # is no longer in the players inventory list.
             print("The way has been unlocked.")
             return True
         else:
+            registry.increment("ptp_locked_door_bounces_total", self.description)
             print("The way to the %s is locked." % self.doors[direction].description)
             print("The correct key for this passage is not in your inventory.")
             return False
@@ -146,6 +214,7 @@ class Room:
             else:                                          # If door does not exist, error message shown in UI
                 print("No such doorway exists! Try inspecting the room.")
         else:  # If direction not listed under 'allDirections', clause reached and error message shown in UI
+            registry.increment("ptp_rejected_inputs_total", "direction")
             print("[Direction not registered. Please check for typos or try another.]")
 
     def hint(self, player):
@@ -0,0 +1,299 @@
+from array import array
+from heapq import heappush, heappop
+
+
+class RouteTooFar(Exception):
+    """Raised by 'RouteIndex.route' when its search of a large part of a world gives up before finding a route."""
+
+
+class RouteIndex:
+    """
+    Answers "how do I get to the ...?" for the 'ROUTE' and 'GOTO' actions (see Game class). The index is built once
+    per world, when its template is created (see Game's 'template' method), and shared by every game of that world.
+    Rooms are numbered, and the doors of room 'r' numbered from 'doorStart[r]' up to 'doorStart[r + 1]': door 'd'
+    leads to room 'doorTarget[d]', in direction 'directions[doorDirection[d]]', and 'doorLocked[d]' is 1 if it is
+    locked as the world begins. These are flat arrays of integers, rather than an object per room or door.
+
+    Rooms are grouped into parts, joined by doors in either direction whether locked or not, so that no route leaves
+    its part. For each part of at most TABLE_LIMIT rooms, the shortest route between every pair of its rooms through
+    doors unlocked as the world begins is found up front, and kept as two tables of bytes: the distance between each
+    pair, and the door to take from one towards the other. A route is then read from the tables one door at a time,
+    taking time in proportion to its length.
+
+    Which doors are unlocked differs from game to game, and so is never held by the index. Each game's world state
+    lists the doors it has unlocked (see 'WorldState.unlockedDoors'), which may only shorten routes: where a game has
+    unlocked doors within a part, the route passes through whichever of them are quickest, as found by a search over
+    just those doors using the tables' distances between them, and is read from the tables between each. Unlocking a
+    door, or undoing its unlocking, therefore needs no update to the index at all.
+
+    Parts of more rooms than TABLE_LIMIT would need tables too large to keep, and are instead searched breadth-first
+    whenever asked; such a search gives up with RouteTooFar once SEARCH_LIMIT rooms have been reached, so that no one
+    command may hold up every other session for long.
+    """
+
+    TABLE_LIMIT = 128         # Most rooms within a part given tables
+    SEARCH_LIMIT = 2048       # Most rooms reached when searching a larger part
+    NONE = 0xFF               # Table entry where there is no route, or no door to take
+    UNTABLED = 0xFFFFFFFF     # Offset within 'tables' of a part given no tables
+
+    # Every array of the index, as passed to '__init__'
+    ARRAYS = ("doorStart", "doorTarget", "doorDirection", "doorLocked", "roomPart", "roomPlace", "partSize",
+              "partTable")
+
+    def __init__(self, arrays: dict, tables: bytes, directions: list, names: dict):
+        """
+        Initialises the index from arrays already built (see 'fromRooms'.) As well as the door arrays above, these give
+        each room's part ('roomPart') and place within it ('roomPlace'), and each part's size ('partSize') and offset
+        of its tables within 'tables' ('partTable'): distances first, then the places of doors to take, each as one
+        byte per pair of rooms.
+
+        :param arrays: dict of (name, array) pairs, for each of ARRAYS
+        :param tables: bytes
+        :param directions: list of str
+        :param names: dict of (upper case description, room number) pairs
+        """
+
+        for name in self.ARRAYS:
+            setattr(self, name, arrays[name])
+        self.tables = tables
+        self.directions = directions
+        self.directionIds = {direction: i for i, direction in enumerate(directions)}
+        self.names = names
+
+    @classmethod
+    def fromRooms(cls, rooms: list):
+        """
+        Builds the index over the given rooms, which should include every room connected to any of them (as returned
+        by Game's 'allRooms' method.) Each room is numbered by its position within 'rooms', which is also its position
+        within every game's world state.
+
+        :param rooms: list of Room objects
+        :return: RouteIndex
+        """
+
+        index = {room: i for i, room in enumerate(rooms)}
+        arrays = {name: array("I") for name in cls.ARRAYS}
+        directions, directionIds = [], {}
+        arrays["doorStart"].append(0)
+        for room in rooms:
+            for direction, connectedRoom in room.doors.items():
+                if direction not in directionIds:
+                    directionIds[direction] = len(directions)
+                    directions.append(direction)
+                arrays["doorTarget"].append(index[connectedRoom])
+                arrays["doorDirection"].append(directionIds[direction])
+                arrays["doorLocked"].append(direction in room.locks)
+            arrays["doorStart"].append(len(arrays["doorTarget"]))
+
+        names = {}
+        for i, room in enumerate(rooms):
+            names.setdefault(room.description.upper(), i)
+        routes = cls(arrays, b"", directions, names)
+        routes.tables = routes.buildTables()
+        return routes
+
+    def buildTables(self) -> bytes:
+        """
+        Groups the rooms into parts, filling 'roomPart', 'roomPlace', 'partSize' and 'partTable', and returns the tables
+        of every part given them.
+
+        :return: bytes
+        """
+
+        roomCount = len(self.doorStart) - 1
+        neighbours = [[] for _ in range(roomCount)]         # Rooms joined to each by a door, in either direction
+        for room in range(roomCount):
+            for door in range(self.doorStart[room], self.doorStart[room + 1]):
+                neighbours[room].append(self.doorTarget[door])
+                neighbours[self.doorTarget[door]].append(room)
+
+        self.roomPart = array("I", [0]) * roomCount
+        self.roomPlace = array("I", [0]) * roomCount
+        seen = bytearray(roomCount)
+        tables = bytearray()
+        for first in range(roomCount):
+            if seen[first]:
+                continue
+            seen[first] = 1
+            members = [first]
+            for room in members:
+                for neighbour in neighbours[room]:
+                    if not seen[neighbour]:
+                        seen[neighbour] = 1
+                        members.append(neighbour)
+
+            part = len(self.partSize)
+            for place, room in enumerate(members):
+                self.roomPart[room], self.roomPlace[room] = part, place
+            self.partSize.append(len(members))
+            if len(members) > self.TABLE_LIMIT or \
+                    any(self.doorStart[room + 1] - self.doorStart[room] >= self.NONE for room in members):
+                self.partTable.append(self.UNTABLED)            # Door places must also fit within a byte
+            else:
+                self.partTable.append(len(tables))
+                tables += self.partTables(members)
+        return bytes(tables)
+
+    def partTables(self, members: list) -> bytearray:
+        """
+        Finds the shortest routes between every pair of rooms within a part, through doors unlocked as the world
+        begins, by a breadth-first search from each, returning the part's tables.
+
+        :param members: list of int
+        :return: bytearray
+        """
+
+        size = len(members)
+        distances = bytearray([self.NONE]) * (size * size)
+        doors = bytearray([self.NONE]) * (size * size)
+        for source in members:
+            row = self.roomPlace[source] * size
+            distances[row + self.roomPlace[source]] = 0
+            queue = [source]
+            for current in queue:
+                entry = row + self.roomPlace[current]
+                for door in range(self.doorStart[current], self.doorStart[current + 1]):
+                    connected = row + self.roomPlace[self.doorTarget[door]]
+                    if not self.doorLocked[door] and distances[connected] == self.NONE:
+                        distances[connected] = distances[entry] + 1
+                        doors[connected] = door - self.doorStart[source] if current == source else doors[entry]
+                        queue.append(self.doorTarget[door])
+        return distances + doors
+
+    def __len__(self):
+        return len(self.roomPart)
+
+    def findDoor(self, room: int, direction: str):
+        """
+        Returns the number of the given room's door in the given direction, or None.
+
+        :param room: int
+        :param direction: str
+        :return: int
+        """
+
+        directionId = self.directionIds.get(direction)
+        for door in range(self.doorStart[room], self.doorStart[room + 1]):
+            if self.doorDirection[door] == directionId:
+                return door
+        return None
+
+    def route(self, world: object, source: int, target: int):
+        """
+        Returns the list of directions leading from one room to another through doors unlocked within the given world
+        state, or None if no such route exists. Raises RouteTooFar if a search of a large part gives up first.
+
+        :param world: WorldState
+        :param source: int
+        :param target: int
+        :return: list
+        """
+
+        part = self.roomPart[source]
+        if part != self.roomPart[target]:
+            return None
+        unlocked = [(room, self.findDoor(room, direction)) for room, direction in world.unlockedDoors()
+                    if self.roomPart[room] == part]
+
+        offset = self.partTable[part]
+        if offset == self.UNTABLED:
+            return self.search(source, target, {door for _, door in unlocked})
+        size = self.partSize[part]
+
+        def distance(start: int, end: int) -> int:
+            return self.tables[offset + self.roomPlace[start] * size + self.roomPlace[end]]
+
+        # Searches for the quickest order in which to pass unlocked doors, if any: node 'i' stands for having just
+        # passed through door 'unlocked[i]', node -1 for the source, and node 'len(unlocked)' for the target.
+        found = {}                                          # Contains (node, node before) pairs
+        queue = [(0, -1, None)]
+        while queue:
+            cost, node, previous = heappop(queue)
+            if node in found:
+                continue
+            found[node] = previous
+            if node == len(unlocked):
+                break
+            room = source if node == -1 else self.doorTarget[unlocked[node][1]]
+            if distance(room, target) != self.NONE:
+                heappush(queue, (cost + distance(room, target), len(unlocked), node))
+            for i, (doorRoom, door) in enumerate(unlocked):
+                if i not in found and distance(room, doorRoom) != self.NONE:
+                    heappush(queue, (cost + distance(room, doorRoom) + 1, i, node))
+        else:
+            return None
+
+        passed = []                                         # Unlocked doors passed, in order
+        node = found[len(unlocked)]
+        while node != -1:
+            passed.append(unlocked[node])
+            node = found[node]
+        directions = []
+        for room, door in reversed(passed):
+            self.follow(offset, size, source, room, directions)
+            directions.append(self.directions[self.doorDirection[door]])
+            source = self.doorTarget[door]
+        self.follow(offset, size, source, target, directions)
+        return directions
+
+    def follow(self, offset: int, size: int, source: int, target: int, directions: list):
+        """
+        Adds the directions of the shortest route between two rooms, through doors unlocked as the world begins, to
+        'directions', as read from the tables of their part.
+
+        :param offset: int
+        :param size: int
+        :param source: int
+        :param target: int
+        :param directions: list
+        """
+
+        doors = offset + size * size
+        while source != target:
+            door = self.doorStart[source] + self.tables[doors + self.roomPlace[source] * size + self.roomPlace[target]]
+            directions.append(self.directions[self.doorDirection[door]])
+            source = self.doorTarget[door]
+
+    def search(self, source: int, target: int, unlocked: set):
+        """
+        Returns the list of directions leading from one room to another through doors unlocked as the world begins, or
+        within 'unlocked', by a breadth-first search; or None if no such route exists. Raises RouteTooFar once more
+        than SEARCH_LIMIT rooms have been reached without finding one.
+
+        :param source: int
+        :param target: int
+        :param unlocked: set of int
+        :return: list
+        """
+
+        previous = {source: None}                           # Contains (room, (room before, door)) pairs
+        queue = [source]
+        for current in queue:
+            if current == target:
+                break
+            if len(previous) > self.SEARCH_LIMIT:
+                raise RouteTooFar("No route found within %d rooms." % self.SEARCH_LIMIT)
+            for door in range(self.doorStart[current], self.doorStart[current + 1]):
+                connected = self.doorTarget[door]
+                if connected not in previous and (not self.doorLocked[door] or door in unlocked):
+                    previous[connected] = (current, door)
+                    queue.append(connected)
+        else:
+            return None
+
+        directions = []
+        while previous[target] is not None:                 # Follows the search back to its start
+            target, door = previous[target]
+            directions.append(self.directions[self.doorDirection[door]])
+        directions.reverse()
+        return directions
+
+    def findRoom(self, name: str):
+        """
+        Returns the number of the room whose description matches the given name (ignoring case), or None.
+
+        :param name: str
+        :return: int
+        """
+
+        return self.names.get(name.upper())
@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+from Sessions import SessionStore
+from Text import Text
+
+
+class Server:
+    """
+    Hosts the game for remote players over plain TCP, one session (see Sessions module) per connection. The protocol
+    is line-based so that the game may be played through any terminal client (e.g. 'telnet localhost 4000'):
+
+        - Upon connecting, the player is sent the game's introduction, one page at a time. At each of its enter checks
+          an empty line shows the next page, while any other line skips the rest and is run as below.
+        - Every line sent may carry several commands, along with the answers to any questions these ask, each separated
+          by a ';' (e.g. 'GO EAST; INTERACT; OPEN; STORE; 1; CLOSE'). All are run together, and their text returned
+          as a single response. A question left unanswered at the end of a line is answered by the next.
+        - Every response ends with the prompt '> ', after which the next line may be sent.
+
+    The connection is closed once the player quits or escapes, and their session removed.
+
+    Several servers may listen upon the same port, each within its own worker process, if 'reusePort' is set; the
+    system then shares connections between them. Started so by 'main' ('--workers'), every worker plays its sessions
+    upon one WorldImage (see WorldImage module) published by the parent process, rather than each holding the world.
+
+    Sending the server SIGHUP reloads the game's world while players play on (see SessionStore's 'reloadWorld'.) With
+    workers, the parent process alone reloads it, publishing a new image whose name is sent to each worker through its
+    'releases' connection.
+    """
+
+    PROMPT = "> "
+
+    def __init__(self, store=None, host="127.0.0.1", port=4000, reusePort=False, releases=None):
+        """
+        Initialises the server, creating its own session store if none is given.
+
+        :param store: SessionStore
+        :param host: str
+        :param port: int
+        :param reusePort: bool
+        :param releases: multiprocessing.connection.Connection
+        """
+
+        self.store = store if store is not None else SessionStore()
+        self.host = host
+        self.port = port
+        self.reusePort = reusePort
+        self.releases = releases  # Receives the name of each world image published after the first, if any
+
+    async def handle(self, reader, writer):
+        """
+        Runs a single player's connection, from their session's creation to its removal.
+
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        """
+
+        # Only the session's id is held while awaiting the player, as the session itself may meanwhile be spilled
+        # and loaded back as a new object (see Sessions module); it is looked up afresh for every command.
+        sessionId = self.store.createSession().sessionId
+        try:
+            line = await self.sendIntro(self.store.getSession(sessionId).game.story.introPages(), reader, writer)
+
+            finished = False
+            while not finished:
+                if line is None:
+                    received = await reader.readline()
+                    if not received:                  # Player disconnected
+                        break
+                    line = received.decode("utf-8", "replace").rstrip("\r\n")
+                output = self.store.runCommand(sessionId, line)
+                line = None
+                finished = self.store.getSession(sessionId).finished
+                writer.write((output + ("" if finished else self.PROMPT)).encode("utf-8"))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.store.closeSession(sessionId)
+            writer.close()
+
+    async def sendIntro(self, pages, reader, writer):
+        """
+        Sends the pages of a game's introduction (see Text module), waiting for a line from the player at each enter
+        check. Returns the first line which was not empty, should the player skip the rest of the introduction, or
+        None once all pages have been sent (or the player disconnected.)
+
+        :param pages: Iterator[Tuple[str, bool]]
+        :param reader: asyncio.StreamReader
+        :param writer: asyncio.StreamWriter
+        :return: str
+        """
+
+        for text, check in pages:
+            writer.write((text + "\n").encode("utf-8"))
+            if check:
+                writer.write((Text.CHECK + "\n" + self.PROMPT).encode("utf-8"))
+                await writer.drain()
+                received = await reader.readline()
+                if not received:                      # Player disconnected
+                    return None
+                line = received.decode("utf-8", "replace").rstrip("\r\n")
+                if line.strip() != "":
+                    return line
+        writer.write(self.PROMPT.encode("utf-8"))
+        await writer.drain()
+        return None
+
+    async def evictIdle(self):
+        """Periodically spills idle sessions, even while no commands are being received."""
+
+        while True:
+            await asyncio.sleep(min(self.store.idleTimeout, 10))
+            self.store.evictIdle()
+
+    async def serve(self):
+        """Listens for players until cancelled, reporting the store's sessions within the metrics meanwhile."""
+
+        self.store.registerGauges()
+        if self.releases is not None:
+            asyncio.get_running_loop().add_reader(self.releases.fileno(), self.receiveRelease)
+        server = await asyncio.start_server(self.handle, self.host, self.port, backlog=4096,
+                                            reuse_port=self.reusePort or None)
+        evictor = asyncio.ensure_future(self.evictIdle())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            evictor.cancel()
+
+
+    def receiveRelease(self):
+        """Moves the store onto the world image whose name has just been sent by the parent process (see 'main')."""
+
+        from WorldImage import WorldImage
+        name = self.releases.recv()
+        try:
+            image = WorldImage.attach(name)
+        except FileNotFoundError:  # Already replaced by a later image, whose name follows
+            return
+        self.store.publishImage(image)
+        print("[Worker %d: now playing upon world version %d.]" % (os.getpid(), self.store.release[0]),
+              file=sys.stderr)
+
+
+def reloadWorld(store: SessionStore):
+    """
+    Reloads the store's world within a background thread, reporting the outcome upon standard error once done.
+
+    :param store: SessionStore
+    """
+
+    def reload():
+        store.reloadWorld(background=False)
+        for problem in store.reloadErrors + store.reloadWarnings:
+            print(problem, file=sys.stderr)
+        if store.reloadErrors:
+            print("[World not reloaded, as it contains the errors above.]", file=sys.stderr)
+        else:
+            print("[World reloaded as version %d.]" % store.release[0], file=sys.stderr)
+
+    threading.Thread(target=reload, daemon=True).start()
+
+
+def runServer(server: Server, metricsPort=None, traceMemory=False):
+    """
+    Runs a server until interrupted, along with its memory reports and metrics endpoint, if requested. Unless given
+    new world images by another process (see 'main'), the world is reloaded upon SIGHUP.
+
+    :param server: Server
+    :param metricsPort: int
+    :param traceMemory: bool
+    """
+
+    from MemoryReport import MemoryReport
+    MemoryReport(server.store).install(trace=traceMemory)  # Reports upon SIGUSR1, or at '/debug/memory'
+
+    if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+        if server.releases is None:
+            signal.signal(signal.SIGHUP, lambda signalNumber, frame: reloadWorld(server.store))
+        else:                                 # Reloaded by the parent process alone
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    if metricsPort is not None:
+        from Metrics import registry
+        registry.serve(metricsPort)
+
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def runWorker(imageName: str, number: int, host: str, port: int, metricsPort=None, traceMemory=False,
+              releases=None):
+    """
+    Runs one of several worker processes started by 'main', hosting sessions upon the published world image, and
+    upon each image whose name is later received through 'releases'. Each worker spills to its own directory, and
+    serves its metrics on the port after the previous worker's.
+
+    :param imageName: str
+    :param number: int
+    :param host: str
+    :param port: int
+    :param metricsPort: int
+    :param traceMemory: bool
+    :param releases: multiprocessing.connection.Connection
+    """
+
+    from WorldImage import WorldImage
+    image = WorldImage.attach(imageName)
+    store = SessionStore(spillDir=os.path.join("sessions", "worker%d" % number), image=image)
+    runServer(Server(store, host, port, reusePort=True, releases=releases),
+              None if metricsPort is None else metricsPort + number, traceMemory)
+
+
+def publishWorld(template: object, images: list, connections: list):
+    """
+    Publishes a new world image of the given template for every worker started by 'main', sending its name through
+    each worker's connection, then unlinks the image it replaces; workers keep the old image for as long as any
+    session is played upon it.
+
+    :param template: Game object
+    :param images: list of WorldImage, the last being that published most recently
+    :param connections: list of multiprocessing.connection.Connection
+    """
+
+    from WorldImage import WorldImage
+    images.append(WorldImage.publish(template))
+    for connection in connections:
+        connection.send(images[-1].name)
+    if len(images) > 1:
+        old = images.pop(0)
+        old.close()
+        old.unlink()
+
+
+def main():
+    """Starts the server, and the metrics endpoint if requested. A memory report is printed upon SIGUSR1."""
+
+    parser = argparse.ArgumentParser(description="Hosts the game for remote players.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing one copy of the world")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve metrics on this localhost port (and those following, one per worker)")
+    parser.add_argument("--images-port", type=int, default=None, help="serve room images on this port")
+    parser.add_argument("--trace-memory", action="store_true", help="trace allocations for memory reports (slower)")
+    args = parser.parse_args()
+
+    if args.images_port is not None:
+        from ImageService import ImageService
+        ImageService().serve(args.images_port, args.host)
+
+    if args.workers <= 1:
+        runServer(Server(host=args.host, port=args.port), args.metrics_port, args.trace_memory)
+        return
+
+    from Game import Game
+    from Validator import Validator
+    from WorldImage import WorldImage
+    template = Game.template()
+    validator = Validator(template)  # Checked once here, rather than by every worker
+    if str(validator):
+        print("[This game's rooms contain the following mistakes:]")
+        print(validator)
+    images = [WorldImage.publish(template)]
+
+    context = multiprocessing.get_context("spawn")  # Workers share only the image, not a copy of this process
+    pipes = [context.Pipe(duplex=False) for _ in range(args.workers)]  # Each a (receiving, sending) pair
+    workers = [context.Process(target=runWorker, args=(images[0].name, number, args.host, args.port,
+                                                       args.metrics_port, args.trace_memory, pipes[number][0]))
+               for number in range(args.workers)]
+    for worker in workers:
+        worker.start()
+
+    def reload(signalNumber, frame):       # Compiled and validated once here, then published to every worker
+        module = SessionStore.loadModule("Game", len(reloads) + 1)
+        reloads.append(module)
+        newTemplate = module.Game.template()
+        newValidator = Validator(newTemplate)
+        if str(newValidator):
+            print(newValidator, file=sys.stderr)
+        if not newValidator:
+            print("[World not reloaded, as it contains the errors above.]", file=sys.stderr)
+            return
+        publishWorld(newTemplate, images, [sending for _, sending in pipes])
+        print("[World reloaded; published to every worker.]", file=sys.stderr)
+
+    reloads = []
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, reload)
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+    finally:
+        for image in images:
+            image.close()
+            image.unlink()
+
+
+if __name__ == "__main__":
+    main()
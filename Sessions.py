@@ -0,0 +1,466 @@
+import importlib.util
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict, Counter
+from Game import Game
+from Rooms import Room
+from Catalog import WorldCatalog
+from Console import Console
+from Metrics import registry
+from Validator import Validator
+from Leaderboard import Leaderboard
+
+
+class Session:
+    """
+    A single player's game, driven one command at a time rather than through the 'play' gameplay loop. Each command
+    is run through a headless Console (see Console module), so that the text the player would see is returned as a
+    string instead of being printed.
+
+    A line of input may carry several commands, separated by ';', along with the answers to any questions these ask
+    (e.g. 'INTERACT; OPEN; STORE; 1; CLOSE'); all are run in one step and their text returned together (see Game's
+    'runLine' method.) Answers may also be given as additional arguments to 'runCommand', or upon the following
+    lines: a question still unanswered at the end of a line is kept open for the next.
+    """
+
+    def __init__(self, sessionId: str, template: object):
+        """
+        Initialises the session, creating its game from the given world template (see Game's 'template' method), whose
+        rooms it shares with every other session of that world. The game's intro is not displayed; its pages may be
+        taken from 'game.story.introPages'.
+
+        :param sessionId: str
+        :param template: Game object
+        """
+
+        self.sessionId = sessionId
+
+        self.game = template.__class__(template.title, template=template)
+
+        self.lastActive = time.monotonic()
+        self.finished = False
+        self.worldVersion = 1  # Version of the world the game was last migrated to (see SessionStore's 'reloadWorld')
+
+    def runCommand(self, line: str, *answers: str) -> str:
+        """
+        Runs one line of player input through the game's 'runLine' method, returning all resulting text. Should the
+        line and 'answers' run out before a command has finished asking for input, its question is left open, to be
+        answered by the next line (see Game's 'doInteractAction'.)
+
+        :param line: str
+        :param answers: str
+        :return: str
+        """
+
+        self.lastActive = time.monotonic()
+        with Console() as console:
+            try:
+                wantToQuit = self.game.runLine(";".join((line,) + answers))
+            except EOFError:
+                wantToQuit = False
+                if self.game.interaction is None:  # Not a question which may be answered by a later line
+                    print("[Interaction ended - no further input was given.]")
+        self.finished = wantToQuit or self.game.currentRoom == self.game.exitRoom
+        return console.text()
+
+    def rewind(self, step: int):
+        """
+        Returns the session's game to its state after the given step (see Game's 'rewind' method.)
+
+        :param step: int
+        """
+
+        self.lastActive = time.monotonic()
+        self.game.rewind(step)
+        self.finished = False
+
+
+class SessionPickler(pickle.Pickler):
+    """
+    Pickles a session, writing the rooms, route index and item index its game shares with its world template (see
+    Game's 'shareRooms' method) as references to the template rather than copies, so that a spilled session holds only
+    its own state. It is loaded by a SessionUnpickler given the same template.
+    """
+
+    def __init__(self, file, template: object):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.template = template
+        self.shared = {id(template.rooms): ("rooms",), id(template.routes): ("routes",),
+                       id(template.itemRooms): ("itemRooms",)}
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Room):
+            index = obj.worldIndex
+            if index is not None and index < len(self.template.rooms) and self.template.rooms[index] is obj:
+                return "room", index
+            return None
+        return self.shared.get(id(obj))
+
+
+class SessionUnpickler(pickle.Unpickler):
+    """Loads a session pickled by a SessionPickler, resolving its references against the same world template."""
+
+    def __init__(self, file, template: object):
+        super().__init__(file)
+        self.template = template
+
+    def persistent_load(self, pid):
+        if pid[0] == "room":
+            return self.template.rooms[pid[1]]
+        return getattr(self.template, pid[0])
+
+
+class SessionStore:
+    """
+    Keeps every connected player's Session, while holding in memory only those recently active. Sessions left idle for
+    longer than 'idleTimeout' seconds are written to 'spillDir' by 'evictIdle' and dropped from memory, as are the
+    least recently used sessions whenever more than 'maxResident' are held. This limit is a number of sessions, not
+    of bytes: the memory each holds grows with its history and differs from world to world, and is measured instead
+    by the MemoryReport module, against which 'maxResident' may be chosen. A spilled session is loaded back the next
+    time a command is run upon it, so that this is never noticed by the player. Should a session fail to be spilled
+    (e.g. the disk being full), it is kept in memory instead, and counted within the metrics (see Metrics module).
+
+    Resident sessions are kept within an OrderedDict, least recently used first. Not safe for use from multiple
+    threads; the store is intended to be owned by a single server loop.
+
+    Changes to the world (i.e. the game's 'createRooms' method) may be loaded while sessions are live through
+    'reloadWorld'. The new world is compiled in the background and published by replacing the 'release' attribute,
+    a (version, template) pair, in a single assignment; each session is then migrated onto it the next time a command is
+    run upon it, rather than all at once. Sessions are also migrated before being spilled, and the template of every
+    version upon which sessions were spilled is kept until all of these are loaded back, as their rooms are written
+    as references to the template (see SessionPickler.)
+    """
+
+    def __init__(self, title="The Mysterious Mansion", spillDir="sessions", idleTimeout=300.0, maxResident=1000,
+                 leaderboard=None, catalog=None, image=None):
+        """
+        Initialises the store, creating 'spillDir' if it does not already exist. Winning runs are recorded within
+        'leaderboard' (by default, that stored in 'leaderboard.jsonl'; see Leaderboard module.) If a 'catalog' of
+        several worlds is given (see Catalog module), sessions may be created of any of its worlds, 'title' being the
+        default; otherwise the store loads the default Game's world into a catalog of its own. If a WorldImage is
+        given (see WorldImage module), sessions of the default world are instead played upon the image's rooms, so
+        that several worker processes may share one copy of the world.
+
+        :param title: str
+        :param spillDir: str
+        :param idleTimeout: float
+        :param maxResident: int
+        :param leaderboard: Leaderboard
+        :param catalog: WorldCatalog
+        :param image: WorldImage
+        """
+
+        self.title = title
+        self.catalog = catalog if catalog is not None else WorldCatalog()
+        self.spillDir = spillDir
+        self.idleTimeout = idleTimeout
+        self.maxResident = maxResident  # Number of sessions held in memory at most, however large each is
+
+        self.resident = OrderedDict()  # Contains (sessionId, Session) pairs, least recently used first
+        self.spilled = {}              # Contains (sessionId, world version) pairs for all sessions written to disk
+        self.spilledTemplates = {}     # Contains (world version, [template, spilled session count]) pairs
+        self.locations = {}            # Contains (sessionId, room description) pairs, kept for spilled sessions too
+        self.nextId = 1
+        self.reloads = 0               # Number of times the game's module has been loaded afresh by 'reloadWorld'
+        if image is not None:
+            template = image.template(Game, title)
+        elif title in self.catalog.worlds:
+            template = self.catalog.template(title)
+        else:
+            template = self.catalog.loadWorld(Game, title)
+        self.release = (1, template)   # Latest version of the default world, and its template
+        self.leaderboard = leaderboard if leaderboard is not None else Leaderboard()
+
+        os.makedirs(spillDir, exist_ok=True)
+
+    def registerGauges(self):
+        """
+        Reports this store's sessions within the process' metrics (see Metrics module), in place of any store reported
+        before. Only the store serving players should do so (see Server's 'serve' method), rather than every store
+        created, e.g. those made for a while by the MemoryReport and LoadTest modules.
+        """
+
+        registry.setGauge("ptp_sessions_active", lambda: {(): len(self)})
+        registry.setGauge("ptp_sessions_resident", lambda: {(): len(self.resident)})
+        registry.setGauge("ptp_room_occupancy",
+                          lambda: {(room,): count for room, count in Counter(self.locations.values()).items()})
+
+    def __len__(self):
+        return len(self.resident) + len(self.spilled)
+
+    def createSession(self, title=None) -> Session:
+        """
+        Creates a new session of the given world (the store's 'title' by default, otherwise a world of its catalog),
+        which becomes the most recently used.
+
+        :param title: str
+        :return: Session
+        """
+
+        sessionId = "s%d" % self.nextId
+        self.nextId += 1
+        session = Session(sessionId, self.template(title))
+        session.worldVersion = self.release[0]
+        self.resident[sessionId] = session
+        self.locations[sessionId] = session.game.currentRoom.description
+        registry.increment("ptp_sessions_total")
+        self.evictIdle()
+        return session
+
+    def template(self, title=None):
+        """
+        Returns the template of the given world (see Game's 'template' method): the latest release of the store's own
+        world (its 'title', by default), otherwise that held by its catalog.
+
+        :param title: str
+        :return: Game object
+        """
+
+        if title is None or title == self.title:
+            return self.release[1]
+        return self.catalog.template(title)
+
+    def getSession(self, sessionId: str) -> Session:
+        """
+        Returns the session with the given id, loading it back from disk if it had been spilled. Raises KeyError if no
+        such session exists.
+
+        :param sessionId: str
+        :return: Session
+        """
+
+        if sessionId in self.resident:
+            self.resident.move_to_end(sessionId)  # Marks session as most recently used
+            return self.migrate(self.resident[sessionId])
+        if sessionId not in self.spilled:
+            raise KeyError(sessionId)
+
+        path = self.spillPath(sessionId)
+        version = self.spilled[sessionId]
+        with open(path, "rb") as file:
+            title = pickle.load(file)  # Written ahead of the session, so that its world is known before it is loaded
+            template = self.spilledTemplates[version][0] if version is not None else self.catalog.template(title)
+            session = SessionUnpickler(file, template).load()
+        os.remove(path)
+        self.discardSpilled(sessionId)
+        self.resident[sessionId] = session
+        return self.migrate(session)
+
+    def migrate(self, session: Session, release=None) -> Session:
+        """
+        Moves a session onto the latest world version, if not already upon it (see Game's 'migrate' method), or onto
+        the given (version, template) release.
+
+        :param session: Session
+        :param release: tuple
+        :return: Session
+        """
+
+        if release is None:
+            release = self.release  # Read once, as a new release may be published meanwhile
+        version, template = release
+        if session.worldVersion != version and session.game.title == self.title:  # Only the default world reloads
+            session.game.migrate(template)
+            session.worldVersion = version
+        return session
+
+    @staticmethod
+    def loadModule(moduleName: str, number: int):
+        """
+        Loads the current source of the module defining the game's rooms as a new module, named with the given number
+        (e.g. 'Game_2'), rather than reloading the module in place: the module already loaded, whose Game class live
+        sessions are still played upon, is left untouched while the new one is run. The new module is kept within
+        'sys.modules', so that sessions of its Game class may be pickled (see 'spill').
+
+        :param moduleName: str
+        :param number: int
+        :return: module
+        """
+
+        name = "%s_%d" % (moduleName, number)
+        spec = importlib.util.spec_from_file_location(name, importlib.util.find_spec(moduleName).origin)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        return module
+
+    def publishWorld(self, template: object):
+        """
+        Publishes a template as the next version of the store's own world; each session is migrated onto it the next
+        time a command is run upon it.
+
+        :param template: Game object
+        """
+
+        self.release = (self.release[0] + 1, template)  # Published in a single assignment
+
+    def publishImage(self, image: object, moduleName="Game"):
+        """
+        Publishes the world of a newly published WorldImage (see WorldImage module) as the next version, played with the
+        Game class of the module defining the game's rooms, loaded afresh (see 'loadModule'.) The world is taken to have
+        been validated by the process publishing the image.
+
+        :param image: WorldImage
+        :param moduleName: str
+        """
+
+        self.reloads += 1
+        module = self.loadModule(moduleName, self.reloads)
+        self.publishWorld(image.template(module.Game, self.title))
+
+    def reloadWorld(self, moduleName="Game", background=True):
+        """
+        Loads the module defining the game's rooms afresh (see 'loadModule'), compiles its world and, if found free of
+        errors by the Validator (its warnings being kept within 'reloadWarnings', but not preventing publishing),
+        publishes it as the next world version. Unless 'background' is False, this is done within a separate thread,
+        which is returned; live sessions continue to be played upon their current version meanwhile. (Stores played
+        upon a world image are instead sent each new image by the process publishing it; see Server module.)
+
+        :param moduleName: str
+        :param background: bool
+        :return: threading.Thread
+        """
+
+        self.reloads += 1
+        number = self.reloads
+
+        def compileWorld():
+            module = self.loadModule(moduleName, number)
+            template = module.Game.template(self.title)
+
+            validator = Validator(template)
+            self.reloadErrors = validator.errors
+            self.reloadWarnings = validator.warnings
+            if validator:                                          # Warnings alone do not prevent publishing
+                self.publishWorld(template)
+
+        self.reloadErrors = []
+        self.reloadWarnings = []
+        if not background:
+            compileWorld()
+            return None
+        thread = threading.Thread(target=compileWorld, daemon=True)
+        thread.start()
+        return thread
+
+    def runCommand(self, sessionId: str, line: str, *answers: str) -> str:
+        """
+        Runs a command upon the given session (see Session's 'runCommand' method), then evicts any sessions which have
+        since become idle.
+
+        :param sessionId: str
+        :param line: str
+        :param answers: str
+        :return: str
+        """
+
+        session = self.getSession(sessionId)
+        wasFinished = session.finished
+        output = session.runCommand(line, *answers)
+        self.locations[sessionId] = session.game.currentRoom.description
+        if session.finished and not wasFinished and session.game.currentRoom == session.game.exitRoom:  # Winning run
+            with Console() as console:
+                session.game.recordRun(self.leaderboard, sessionId)
+            output += console.text()
+        self.evictIdle()
+        return output
+
+    def rewind(self, sessionId: str, step: int):
+        """
+        Returns a session to its state after the given step, 0 being the start of its game.
+
+        :param sessionId: str
+        :param step: int
+        """
+
+        session = self.getSession(sessionId)
+        session.rewind(step)
+        self.locations[sessionId] = session.game.currentRoom.description
+
+    def closeSession(self, sessionId: str):
+        """
+        Removes a session entirely, whether held in memory or on disk.
+
+        :param sessionId: str
+        """
+
+        self.resident.pop(sessionId, None)
+        self.locations.pop(sessionId, None)
+        if sessionId in self.spilled:
+            self.discardSpilled(sessionId)
+            os.remove(self.spillPath(sessionId))
+
+    def evictIdle(self):
+        """
+        Spills to disk every session idle for longer than 'idleTimeout', then the least recently used sessions until
+        no more than 'maxResident' remain in memory.
+        """
+
+        now = time.monotonic()
+        failed = 0  # Sessions which could not be spilled, moved to the end of 'resident' so that others are tried
+        while len(self.resident) > failed:
+            sessionId, session = next(iter(self.resident.items()))  # Least recently used session
+            if now - session.lastActive <= self.idleTimeout:
+                break                                                # All following sessions used more recently
+            if not self.spill(sessionId):
+                failed += 1
+
+        while len(self.resident) > max(self.maxResident, failed):
+            if not self.spill(next(iter(self.resident))):
+                failed += 1
+
+    def spill(self, sessionId: str) -> bool:
+        """
+        Writes a resident session to disk and drops it from memory, first migrating it onto the latest world version.
+        Returns whether this succeeded: if not, the session is kept in memory as the most recently used, and the
+        error is reported upon stderr.
+
+        :param sessionId: str
+        :return: bool
+        """
+
+        session = self.resident[sessionId]
+        path = self.spillPath(sessionId)
+        title = session.game.title
+        release = self.release
+        version, template = release if title == self.title else (None, self.catalog.template(title))
+        try:
+            self.migrate(session, release)  # Its rooms (and class) are then those of the template kept below
+            with open(path + ".tmp", "wb") as file:
+                pickle.dump(title, file, pickle.HIGHEST_PROTOCOL)
+                SessionPickler(file, template).dump(session)
+            os.replace(path + ".tmp", path)  # Only replaces once fully written, so a spilled session is never partial
+        except Exception as error:
+            registry.increment("ptp_session_spill_failures_total")
+            print("[Session %s could not be spilled, so remains in memory: %r]" % (sessionId, error), file=sys.stderr)
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+            self.resident.move_to_end(sessionId)
+            return False
+
+        del self.resident[sessionId]  # Only dropped from memory once safely on disk
+        self.spilled[sessionId] = version
+        if version is not None:
+            self.spilledTemplates.setdefault(version, [template, 0])[1] += 1
+        return True
+
+    def discardSpilled(self, sessionId: str):
+        """
+        Forgets a session which is no longer spilled, along with the template of its world version once no other
+        spilled session requires it.
+
+        :param sessionId: str
+        """
+
+        version = self.spilled.pop(sessionId)
+        if version is not None:
+            entry = self.spilledTemplates[version]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.spilledTemplates[version]
+
+    def spillPath(self, sessionId: str) -> str:
+        return os.path.join(self.spillDir, sessionId + ".session")
@@ -1,4 +1,4 @@
-from typing import List  # Allows for type hinting annotation
+from typing import Iterator, List, Tuple  # Allows for type hinting annotation
 
 
 class Text:
@@ -7,8 +7,15 @@ class Text:
     interactive checks, and intro/outro texts (sub classes of this class.) Both static methods, 'prepareText' and
     'printText' are designed to prepare and print text within the UI while allowing the user a greater level of
     formatting control than through 'print()' function alone.
+
+    Prepared text is presented as pages: each page is the text of one text box, along with whether the player should
+    press Enter before the next is shown (an 'enter check'.) Pages are produced by generators, so that no text is
+    printed, nor input requested, until a page is asked for - the caller may then print them ('playPages'), skip them,
+    or send them elsewhere (e.g. to a remote player, see Server module.)
     """
 
+    CHECK = "[Press the Enter key to continue.]"
+
     @staticmethod
     def prepareText(*lines: str, includeCheck=False) -> List[str]:
         """
@@ -25,55 +32,88 @@ class Text:
             textReady[-1] = " "                 # Acts as a key within the 'printText' module if check wanted
         return textReady
 
+    @staticmethod
+    def pages(*textboxes: List[str]) -> Iterator[Tuple[str, bool]]:
+        """
+        Yields each text box prepared using the 'prepareText' method as a page, i.e. a (text, enter check) pair.
+        """
+
+        for textbox in textboxes:                               # Allows many prepared texts to be yielded in turn,
+            yield "\n".join(textbox), textbox[-1] == " "        # checking whether user included check section.
+
+    @staticmethod
+    def enterCheck():
+        """Waits for the player to press the Enter key, before any following text is printed."""
+
+        checked = False
+        print(Text.CHECK)
+        while not checked:
+            if input("> ").upper() == "":
+                checked = True
+            else:
+                print("[Invalid entry, please press the Enter key to continue.]")
+
+    @staticmethod
+    def playPages(pages: Iterator[Tuple[str, bool]], includeChecks=True):
+        """
+        Prints each page in turn, waiting for the Enter key after those with an enter check, unless 'includeChecks' is
+        False.
+
+        :param pages: Iterator[Tuple[str, bool]]
+        :param includeChecks: bool
+        """
+
+        for text, check in pages:
+            print(text)  # Prints text as outlined by user.
+            if check and includeChecks:
+                Text.enterCheck()
+
     @staticmethod
     def printText(*textboxes: List[str]):
         """Takes each text box prepared for printing using the 'textBox' method and prints them."""
 
-        for textbox in textboxes:   # Allows many prepared texts to be printed simultaneously, without needing to
-            for line in textbox:    # call the method multiple times.
-                print(line)         # Prints text as outlined by user.
-            if textbox[-1] == " ":  # Checks whether user included check section, continues if True.
-                checked = False
-                print("[Press the Enter key to continue.]")
-                while not checked:
-                    if input("> ").upper() == "":
-                        checked = True
-                    else:
-                        print("[Invalid entry, please press the Enter key to continue.]")
+        Text.playPages(Text.pages(*textboxes))
 
 
 class Narrative(Text):
     """
-    Designed so that, upon being instanced in the 'Main' module, the intro is executed and game narrative made
-    accessible. The user may input and display through the UI any given text (using the inherited 'prepareText' and
-    'printText' methods from the super class 'Text') by calling the 'storyText' class method.
+    Holds the game's narrative, instanced within the Game class. Nothing is displayed upon being instanced: the intro
+    is displayed by 'introText' (see Game's 'play' method), or its pages taken one at a time from 'introPages'. The user
+    may input and display through the UI any given text (using the inherited 'prepareText' and 'printText' methods
+    from the super class 'Text') by calling the 'storyText' class method.
     """
 
     def __init__(self, *introLines: str, title="my game", exit="exit"):
         """
-        Takes each 'introSection' and assigns them to the 'allIntroLines' class attribute for use within 'introText',
-        which is then executed. Here the syntax "#" is used to denote when an enter check is to be included by the user.
+        Takes each 'introSection' and assigns them to the 'introLines' attribute for use within 'introPages'. Here the
+        syntax "#" is used to denote when an enter check is to be included by the user.
 
         :param introLine: str
         """
 
         self.introLines = *(line for line in introLines),  # Tuple comprehension for necessary data type in line.88
-        self.introText(title, exit)  # Displays the intro text in the UI, as instructed by the user
+        self.title = title
+        self.exit = exit
 
-    def introText(self, title: str, exit: str):
+    def introText(self, includeChecks=True):
         """
-        Runs the 'allIntroLines' attribute through 'storyText' method, which then displays them in the UI as formatted
-        by the user (additional borders can be included which automatically change size depending on how the user
-        formats the introParagraph argument.)
+        Displays the intro text in the UI, as instructed by the user.
 
-        :param title: str
-        :param exit: str
-        :return:
+        :param includeChecks: bool
+        """
+
+        self.playPages(self.introPages(), includeChecks)
+
+    def introPages(self) -> Iterator[Tuple[str, bool]]:
+        """
+        Yields the pages of the intro: a welcome paragraph, then the 'introLines' attribute as prepared by 'storyPages'
+        (additional borders can be included which automatically change size depending on how the user formats the
+        introParagraph argument.)
         """
 
         introParagraph = self.prepareText(
             "Welcome to %s, a word-based adventure game, where your goal\n"
-            "is to explore each room, uncover their secrets, reach the %s and escape." % (title, exit),
+            "is to explore each room, uncover their secrets, reach the %s and escape." % (self.title, self.exit),
             "To navigate the area, enter 'GO' along with the direction you want to travel\n"
             "in the space below (e.g. 'GO EAST'.)",
             "If you ever get stuck, enter the action word 'MENU' to see all available\n"
@@ -86,12 +126,12 @@ class Narrative(Text):
         borderLength = max([len(line) for line in introParagraph])  # Finds maximum length out of each line
         for i in range(borderLength):
             borderBase += "="                                       # Increases border length to equal introParagraph
-        border = self.prepareText(borderBase)                       # Prepares border for use within printText method
+        border = self.prepareText(borderBase)                       # Prepares border for use within 'pages' method
 
-        self.printText(border, introParagraph, border)  # Displays introParagraph & borders in UI
+        yield from self.pages(border, introParagraph, border)  # Yields introParagraph & borders
 
-        self.storyText(*self.introLines)  # Displays introduction narrative & tip in UI.
-        print("[Use your available actions to search the area.]")
+        yield from self.storyPages(*self.introLines)  # Yields introduction narrative & tip.
+        yield "[Use your available actions to search the area.]", False
 
     def storyText(self, *storyLines: str):
         """
@@ -99,7 +139,15 @@ class Narrative(Text):
         default.) Enter "#" as an argument after any line the user wishes to include an enter check.
 
         :param storyLines: str
-        :return:
+        """
+
+        self.playPages(self.storyPages(*storyLines))
+
+    def storyPages(self, *storyLines: str) -> Iterator[Tuple[str, bool]]:
+        """
+        Yields the pages of narrative text given as for 'storyText', one per segment between enter checks.
+
+        :param storyLines: str
         """
 
         storySegments = []
@@ -119,19 +167,26 @@ class Narrative(Text):
             segment = []           # Variable reset for following segment, if needed
             checkIncluded = False  # Variable reset for following segment, if needed (assumes no enter check)
 
-        self.printText(*tuple(storySegments))  # Changes 'storySegments' data type into tuple for use as argument, then
-                                               # prints through 'printText' method.
+        yield from self.pages(*tuple(storySegments))  # Changes 'storySegments' data type into tuple for use as
+                                                      # argument, then yields through 'pages' method.
 
-    def outroText(self, *outroLines, winCheck=False):
+    def outroText(self, *outroLines, winCheck=False, moves=None):
         """
         :param winCheck:
+        :param moves: Number of doors passed through to win the game, if known (see Leaderboard module)
         """
 
-        if winCheck:                     # Under condition that game is won instead of quit via 'QUIT' action, bonus
-            self.storyText(*outroLines)  # story text is presented in UI
+        self.playPages(self.outroPages(*outroLines, winCheck=winCheck, moves=moves))
+
+    def outroPages(self, *outroLines, winCheck=False, moves=None) -> Iterator[Tuple[str, bool]]:
+        """Yields the pages of the outro, as displayed by 'outroText'."""
+
+        if winCheck:                                  # Under condition that game is won instead of quit via 'QUIT'
+            yield from self.storyPages(*outroLines)   # action, bonus story text is presented in UI
 
         outroParagraph = self.prepareText(
             "Thank you for playing!",
-            "If you'd like to play again, why not see if you can win in under X?"
+            "If you'd like to play again, why not see if you can win in under %s?" %
+            ("%d moves" % moves if moves is not None else "X")
         )
-        self.printText(outroParagraph)
+        yield from self.pages(outroParagraph)
@@ -0,0 +1,247 @@
+import gc
+import os
+
+
+class Validator:
+    """
+    Checks a game's world, as created by 'Game.createRooms', for mistakes which would otherwise only be found by
+    playing: room images which do not exist, rooms which cannot be reached, doors with no way back, and locks whose keys
+    can never be found (e.g. a key placed only behind the very door it opens.) Every problem found is listed, naming
+    the rooms involved, within the 'errors' and 'warnings' attributes. Validation is run once each time a world is
+    loaded (by Game's 'main', WorldCatalog's 'loadWorld' or SessionStore's 'reloadWorld'), never for each game.
+
+    Every check visits each room and door a fixed number of times, so that even very large generated worlds may be
+    validated each time they are loaded:
+        - 'checkImages' checks each image path once, however many rooms share it.
+        - 'checkReachable' searches from the start room, ignoring locks.
+        - 'checkOneWay' finds the strongly connected components of the door graph (Tarjan's algorithm); a door leading
+          out of its room's component has no way back.
+        - 'checkKeys' searches from the start room once more, passing a locked door only once its key has been found
+          in a room already reached.
+    """
+
+    def __init__(self, game: object):
+        """
+        Initialises the validator, running every check upon the given game's world.
+
+        :param game: Game object
+        """
+
+        self.game = game
+        self.errors = []
+        self.warnings = []
+
+        # The checks below create many small lists, none of which can form reference cycles, so garbage collection
+        # would only slow them by repeatedly scanning every object of the (possibly very large) world.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self.validate()
+        finally:
+            if collecting:
+                gc.enable()
+
+    def validate(self):
+        """Numbers every room of the game, then runs each check in turn."""
+
+        game = self.game
+
+        # Every Room attribute of the game, along with all rooms connected to these, is numbered for use in each check
+        self.rooms = game.allRooms()
+        self.index = {room: i for i, room in enumerate(self.rooms)}
+
+        # Contains, for each room, the number of the room behind each of its doors (in the same order as 'doors')
+        index = self.index
+        self.targets = [[index[connectedRoom] for connectedRoom in room.doors.values()] for room in self.rooms]
+
+        self.start = self.index[game.startRoom]
+        self.exit = self.index[game.exitRoom]
+
+        self.checkImages()
+        self.checkReachable()
+        self.checkOneWay()
+        self.checkKeys()
+
+    def __bool__(self):
+        return not self.errors
+
+    def __str__(self):
+        return "\n".join(["ERROR: " + error for error in self.errors] +
+                         ["WARNING: " + warning for warning in self.warnings])
+
+    def checkImages(self):
+        """
+        Warns of each room whose image file does not exist, relative to the directory of the game's module (see Game's
+        'resolvePath' method.) Only the GUI displays images, so the game remains playable without them.
+        """
+
+        exists = {}
+        for room in self.rooms:
+            if room is self.game.exitRoom:
+                continue                                # Exit room's image is never displayed
+            if room.roomImg not in exists:
+                exists[room.roomImg] = os.path.isfile(self.game.resolvePath(room.roomImg))
+            if not exists[room.roomImg]:
+                self.warnings.append("The %s's image '%s' does not exist." % (room.description, room.roomImg))
+
+    def checkReachable(self):
+        """Lists each room which cannot be reached from the start room through any door, locked or not."""
+
+        reached = [False] * len(self.rooms)
+        reached[self.start] = True
+        queue = [self.start]
+        for current in queue:
+            for target in self.targets[current]:
+                if not reached[target]:
+                    reached[target] = True
+                    queue.append(target)
+
+        if not reached[self.exit]:
+            self.errors.append("The %s and %s are disconnected: no doors lead from one to the other." %
+                               (self.game.startRoom.description, self.game.exitRoom.description))
+        for i, room in enumerate(self.rooms):
+            if not reached[i] and i != self.exit:
+                self.errors.append("The %s cannot be reached from the %s." %
+                                   (room.description, self.game.startRoom.description))
+
+    def components(self) -> list:
+        """
+        Returns the strongly connected component number of each room, i.e. rooms share a number only if each can be
+        reached from the other. Follows Tarjan's algorithm, iteratively so that large worlds cannot exceed Python's
+        recursion limit.
+
+        :return: list
+        """
+
+        roomCount = len(self.rooms)
+        targets = self.targets
+        order = [-1] * roomCount                        # Order in which each room is first visited
+        low = [0] * roomCount                           # Earliest visited room reachable from each room's subtree
+        onStack = [False] * roomCount
+        component = [-1] * roomCount
+        stack = []
+        visited = componentCount = 0
+
+        for root in range(roomCount):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = visited
+            visited += 1
+            stack.append(root)
+            onStack[root] = True
+            work = [(root, iter(targets[root]))]
+
+            while work:
+                current, remaining = work[-1]
+                for target in remaining:
+                    if order[target] == -1:             # Unvisited, so search continues from this room
+                        order[target] = low[target] = visited
+                        visited += 1
+                        stack.append(target)
+                        onStack[target] = True
+                        work.append((target, iter(targets[target])))
+                        break
+                    elif onStack[target] and order[target] < low[current]:
+                        low[current] = order[target]
+                else:                                   # All doors searched, so room is finished with
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if low[current] < low[parent]:
+                            low[parent] = low[current]
+                    if low[current] == order[current]:  # Room is the first visited of its component
+                        while True:
+                            member = stack.pop()
+                            onStack[member] = False
+                            component[member] = componentCount
+                            if member == current:
+                                break
+                        componentCount += 1
+
+        return component
+
+    def checkOneWay(self):
+        """Lists each door with no way back to the room it leads from, other than those leading to the exit room."""
+
+        component = self.components()
+        for i, targets in enumerate(self.targets):
+            roomComponent = component[i]
+            for direction, target in zip(self.rooms[i].doors, targets):  # Several doors may lead to the same room
+                if target != self.exit and component[target] != roomComponent:
+                    room = self.rooms[i]
+                    self.errors.append("The door %s from the %s leads to the %s, from which there is no way back." %
+                                       (direction, room.description, self.rooms[target].description))
+
+    def checkKeys(self):
+        """
+        Lists each lock which can never be opened from the start room, and whether the exit room can be reached at all.
+        Locks with no key placed anywhere are only warned of, as these may be intended as one-way passages.
+
+        Keys are not considered used up once a door is opened, nor is the player's inventory limit considered, so that
+        this check remains linear; a world passing it may still be lost by using a key on the wrong door.
+        """
+
+        keyRooms = {}                                   # Contains (key, [rooms containing key]) pairs
+        for room in self.rooms:
+            for item in room.items:
+                keyRooms.setdefault(item, []).append(room)
+
+        reached = [False] * len(self.rooms)
+        reached[self.start] = True
+        queue = [self.start]
+        keysFound = set()
+        waiting = {}                                    # Contains (key, [rooms behind locks it opens]) pairs
+
+        for current in queue:
+            room = self.rooms[current]
+            opened = []
+            for item in room.items:                     # Collects every key in room, opening any doors waiting on it
+                if item not in keysFound:
+                    keysFound.add(item)
+                    opened.extend(waiting.pop(item, ()))
+            locks = room.locks                          # Read once, as each read looks up the room's state
+            if locks:
+                for direction, target in zip(room.doors, self.targets[current]):
+                    if direction not in locks or room.keys[direction] in keysFound:
+                        opened.append(target)
+                    else:
+                        waiting.setdefault(room.keys[direction], []).append(target)
+            else:
+                opened.extend(self.targets[current])
+            for target in opened:
+                if not reached[target]:
+                    reached[target] = True
+                    queue.append(target)
+
+        for i, room in enumerate(self.rooms):
+            if not reached[i]:
+                continue
+            for direction in room.locks:
+                key = room.keys[direction]
+                if key in keysFound:
+                    continue
+                if key not in keyRooms:
+                    self.warnings.append("The door %s from the %s is locked for good: no '%s' is placed anywhere." %
+                                         (direction, room.description, key))
+                else:
+                    self.errors.append("The door %s from the %s can never be opened: its key '%s' lies only in the "
+                                       "%s, which cannot be reached without it." %
+                                       (direction, room.description, key,
+                                        ", ".join(keyRoom.description for keyRoom in keyRooms[key])))
+
+        if not reached[self.exit]:
+            self.errors.append("The %s can never be reached from the %s, whichever keys are found." %
+                               (self.game.exitRoom.description, self.game.startRoom.description))
+
+
+def main():
+    """Validates the default game's world, printing every problem found."""
+
+    from Game import Game
+
+    validator = Validator(Game.template())
+    print(str(validator) or "No problems found.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import multiprocessing
+import struct
+import sys
+import weakref
+from array import array
+from multiprocessing import shared_memory, resource_tracker
+from Rooms import Room
+from Routing import RouteIndex
+
+
+class WorldImage:
+    """
+    A read-only, flat copy of a game's world - every room's text, image path, starting items and door table - laid out
+    within a single block of shared memory. Several worker processes hosting sessions of the same world may then
+    'attach' to one image rather than each holding their own copy, leaving only each session's own state (current
+    room, inventory, storage, collected items and opened locks) private to the worker.
+
+    The image is built by 'compile' from a Game template and published once with 'publish'. Rooms are read back
+    through 'room', which returns a RoomView: its attributes are decoded straight out of shared memory when accessed,
+    and so no copy of the world's text or doors is held by the attaching process. Views are made only when asked for,
+    and kept only while in use (e.g. as a player's current room), so that an image may also stand in for the list of
+    its rooms. 'template' makes a Game template of the image (see Game's 'template' method), from which a worker's
+    sessions are created (see Sessions module), so that each game holds only its own changes to the world.
+
+    The template's route index (see Routing module), and its indexes of rooms by name and by item, are laid out within
+    the image too, as arrays of integers read in place; attaching therefore builds no index of its own either.
+
+    Layout (integers unsigned 32-bit; little-endian, but for the arrays and indexes read in place, which are of the
+    machine's own byte order, as the image is only shared between processes of one machine):
+        header   - magic, room count, door count, item count, string count, start room, exit room, part count,
+                   direction count, table bytes
+        rooms    - per room: description, wordDescription, writtenHint, roomImg, storeroom, first door, door count,
+                   first item, item count
+        doors    - per door: direction, connected room, locked, key (NONE if not locked)
+        items    - per item: string
+        routes   - each array of the route index in turn (see RouteIndex.ARRAYS), then the string of each direction
+        names    - per room, ordered by upper case description: that description's string, room
+        itemRooms - per item, ordered by item: string, room
+        tables   - the route index's tables, padded to a multiple of 4 bytes
+        strings  - per string: offset and length within the following UTF-8 blob
+    """
+
+    MAGIC = 0x50545058  # "PTPX"
+    NONE = 0xFFFFFFFF
+    HEADER = struct.Struct("<10I")
+    ROOM = struct.Struct("<9I")
+    DOOR = struct.Struct("<4I")
+    ITEM = struct.Struct("<I")
+    STRING = struct.Struct("<2I")
+
+    def __init__(self, buffer, memory=None):
+        """
+        Initialises the image over an existing buffer, as returned by 'compile' or held within shared memory.
+
+        :param buffer: bytes or memoryview
+        :param memory: SharedMemory
+        """
+
+        self.memory = memory
+        self.buffer = memoryview(buffer)
+        self.views = weakref.WeakValueDictionary()  # Contains (room index, RoomView) pairs, for views still in use
+        self.exported = []                          # Arrays read in place, released by 'close'
+        self.routes = None                          # RouteIndex, once made by 'template'
+
+        (magic, self.roomCount, self.doorCount, self.itemCount, self.stringCount, self.startIndex, self.exitIndex,
+         self.partCount, self.directionCount, self.tableBytes) = self.HEADER.unpack_from(self.buffer, 0)
+        if magic != self.MAGIC:
+            raise ValueError("Buffer does not contain a world image.")
+
+        # Offsets of each table, in the order laid out by 'compile'
+        self.roomOffset = self.HEADER.size
+        self.doorOffset = self.roomOffset + self.roomCount * self.ROOM.size
+        self.itemOffset = self.doorOffset + self.doorCount * self.DOOR.size
+        self.routeOffset = self.itemOffset + self.itemCount * self.ITEM.size
+        self.nameOffset = self.routeOffset + 4 * sum(self.routeLengths()) + 4 * self.directionCount
+        self.itemRoomOffset = self.nameOffset + 8 * self.roomCount
+        self.tableOffset = self.itemRoomOffset + 8 * self.itemCount
+        self.stringOffset = self.tableOffset + -(-self.tableBytes // 4) * 4
+        self.blobOffset = self.stringOffset + self.stringCount * self.STRING.size
+
+    def routeLengths(self) -> list:
+        """Returns the length of each array of the route index, in the order of RouteIndex.ARRAYS."""
+
+        lengths = {"doorStart": self.roomCount + 1, "doorTarget": self.doorCount, "doorDirection": self.doorCount,
+                   "doorLocked": self.doorCount, "roomPart": self.roomCount, "roomPlace": self.roomCount,
+                   "partSize": self.partCount, "partTable": self.partCount}
+        return [lengths[name] for name in RouteIndex.ARRAYS]
+
+    @classmethod
+    def compile(cls, game: object) -> bytes:
+        """
+        Lays out every room of a game template (see Game's 'template' method), as listed by its 'rooms' attribute, in
+        the flat format above, along with its route index, returning the finished image. Identical strings are stored
+        only once.
+
+        :param game: Game object
+        :return: bytes
+        """
+
+        rooms, routes = game.rooms, game.routes
+        index = {id(room): i for i, room in enumerate(rooms)}
+
+        strings = {}
+
+        def stringId(text: str) -> int:
+            return strings.setdefault(text, len(strings))
+
+        roomTable, doorTable, itemTable = bytearray(), bytearray(), bytearray()
+        names, itemRooms = [], []
+        doorCount = itemCount = 0
+        for i, room in enumerate(rooms):
+            roomTable += cls.ROOM.pack(
+                stringId(room.description), stringId(room.wordDescription), stringId(room.writtenHint),
+                stringId(room.roomImg), room.storeroom,
+                doorCount, len(room.doors), itemCount, len(room.items)
+            )
+            for direction, connectedRoom in room.doors.items():
+                locked = direction in room.locks
+                key = stringId(room.keys[direction]) if locked else cls.NONE
+                doorTable += cls.DOOR.pack(stringId(direction), index[id(connectedRoom)], locked, key)
+            for item in room.items:
+                itemTable += cls.ITEM.pack(stringId(item))
+                itemRooms.append((item, i))
+            names.append((room.description.upper(), i))
+            doorCount += len(room.doors)
+            itemCount += len(room.items)
+
+        routeTable = array("I")
+        for name in RouteIndex.ARRAYS:
+            routeTable.extend(getattr(routes, name))
+        routeTable.extend(stringId(direction) for direction in routes.directions)
+        indexTable = array("I")
+        for text, i in sorted(names) + sorted(itemRooms):  # Ordered for lookup by 'ImageIndex'
+            indexTable.extend((stringId(text), i))
+        tables = bytes(routes.tables) + bytes(-len(routes.tables) % 4)
+
+        stringTable, blob = bytearray(), bytearray()
+        for text in strings:                                    # Dictionaries keep insertion order, i.e. by id
+            encoded = text.encode("utf-8")
+            stringTable += cls.STRING.pack(len(blob), len(encoded))
+            blob += encoded
+
+        header = cls.HEADER.pack(
+            cls.MAGIC, len(rooms), doorCount, itemCount, len(strings), index[id(game.startRoom)],
+            index[id(game.exitRoom)], len(routes.partSize), len(routes.directions), len(routes.tables)
+        )
+        return bytes(header + roomTable + doorTable + itemTable + routeTable.tobytes() + indexTable.tobytes() +
+                     tables + stringTable + blob)
+
+    @classmethod
+    def publish(cls, game: object, name=None):
+        """
+        Compiles the game's world into a newly created block of shared memory. The publishing process is responsible
+        for calling 'unlink' once no worker requires the image any longer.
+
+        :param game: Game object
+        :param name: str
+        :return: WorldImage
+        """
+
+        image = cls.compile(game)
+        memory = shared_memory.SharedMemory(name=name, create=True, size=len(image))
+        memory.buf[:len(image)] = image
+        return cls(memory.buf, memory)
+
+    @classmethod
+    def attach(cls, name: str):
+        """
+        Attaches to an image already published by another process, without copying it.
+
+        :param name: str
+        :return: WorldImage
+        """
+
+        if sys.version_info >= (3, 13):
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name=name)
+            # Attaching registers the block with this process' resource tracker, which would otherwise unlink it for
+            # every other worker when this one exits; only the publishing process should do so. Workers started through
+            # multiprocessing (forked or spawned) share the publisher's tracker instead, and so must leave its
+            # registration be. (The start method is not asked for, as doing so would fix it for the whole process.)
+            if multiprocessing.parent_process() is None:
+                resource_tracker.unregister(memory._name, "shared_memory")
+        return cls(memory.buf, memory)
+
+    @property
+    def name(self):
+        return self.memory.name if self.memory is not None else None
+
+    def close(self):
+        """Detaches this process from the image's shared memory, if any."""
+
+        for view in self.exported:
+            view.release()
+        self.buffer.release()
+        if self.memory is not None:
+            self.memory.close()
+
+    def unlink(self):
+        """Frees the image's shared memory; for use by the publishing process only."""
+
+        if self.memory is not None:
+            self.memory.unlink()
+
+    def string(self, stringId: int) -> str:
+        """
+        Decodes a string from the image's blob.
+
+        :param stringId: int
+        :return: str
+        """
+
+        start, length = self.STRING.unpack_from(self.buffer, self.stringOffset + stringId * self.STRING.size)
+        start += self.blobOffset
+        return str(self.buffer[start:start + length], "utf-8")
+
+    def uints(self, offset: int, count: int) -> memoryview:
+        """
+        Returns an array of 'count' integers laid out from the given offset, read in place.
+
+        :param offset: int
+        :param count: int
+        :return: memoryview
+        """
+
+        view = self.buffer[offset:offset + 4 * count].cast("I")
+        self.exported.append(view)
+        return view
+
+    def room(self, roomIndex: int):
+        """
+        Returns a read-only view of the room at the given index. While a view is in use, the same one is returned, so
+        that each room has a single view, as with rooms.
+
+        :param roomIndex: int
+        :return: RoomView
+        """
+
+        if not 0 <= roomIndex < self.roomCount:
+            raise IndexError("Room index out of range.")
+        view = self.views.get(roomIndex)
+        if view is None:
+            view = self.views[roomIndex] = RoomView(self, roomIndex)
+        return view
+
+    def __len__(self):
+        return self.roomCount
+
+    def __getitem__(self, roomIndex: int):  # Stands in for a template's list of rooms
+        return self.room(roomIndex)
+
+    def findRoom(self, description: str):
+        """
+        Returns a view of the room with the given description, or None if there is no such room.
+
+        :param description: str
+        :return: RoomView
+        """
+
+        roomIndex = self.routeIndex().findRoom(description)
+        if roomIndex is None or self.room(roomIndex).description != description:
+            return None
+        return self.room(roomIndex)
+
+    @property
+    def startRoom(self):
+        return self.room(self.startIndex)
+
+    @property
+    def exitRoom(self):
+        return self.room(self.exitIndex)
+
+    def template(self, gameClass: type, title="The Mysterious Mansion"):
+        """
+        Returns a template of the given Game class (see Game's 'template' method) whose rooms are the views of this
+        image, rather than rooms created by 'createRooms'. Every game created from it shares the image's rooms. Its
+        indexes (see Game's 'indexRooms' method) are those within the image, rather than built anew.
+
+        :param gameClass: type
+        :param title: str
+        :return: Game object
+        """
+
+        template = gameClass.__new__(gameClass)
+        template.title = title
+        template.startRoom, template.exitRoom = self.startRoom, self.exitRoom
+        template.rooms = self
+        template.routes = self.routeIndex()
+        template.itemRooms = ImageIndex(self, self.itemRoomOffset, self.itemCount)
+        for direction in template.routes.directions:  # Directions are otherwise only registered by 'createDoor'
+            if direction not in Room.allDirections:
+                Room.allDirections.append(direction)
+        return template
+
+    def routeIndex(self) -> RouteIndex:
+        """Returns the route index laid out within the image, reading its arrays in place."""
+
+        if self.routes is None:
+            arrays, offset = {}, self.routeOffset
+            for name, length in zip(RouteIndex.ARRAYS, self.routeLengths()):
+                arrays[name] = self.uints(offset, length)
+                offset += 4 * length
+            directions = [self.string(stringId) for stringId in self.uints(offset, self.directionCount)]
+            tables = self.buffer[self.tableOffset:self.tableOffset + self.tableBytes]
+            self.exported.append(tables)
+            self.routes = RouteIndex(arrays, tables, directions, ImageIndex(self, self.nameOffset, self.roomCount,
+                                                                            first=True))
+        return self.routes
+
+
+class ImageIndex:
+    """
+    Looks up rooms by text within one of a WorldImage's ordered indexes - of rooms by name, or by item - standing in for
+    the dictionaries otherwise built by Game's 'indexRooms' method. Each lookup is a binary search, decoding only the
+    strings it compares.
+    """
+
+    def __init__(self, image: WorldImage, offset: int, count: int, first=False):
+        """
+        :param image: WorldImage
+        :param offset: int
+        :param count: int
+        :param first: bool, True if 'get' returns the first room found alone, rather than a list of every room
+        """
+
+        self.image = image
+        self.entries = image.uints(offset, 2 * count)  # Pairs of string and room
+        self.count = count
+        self.first = first
+
+    def get(self, text: str, default=None):
+        """
+        Returns the rooms listed under the given text, or 'default' if none are.
+
+        :param text: str
+        :param default:
+        """
+
+        low, high = 0, self.count
+        while low < high:                              # Finds the first entry not ordered before 'text'
+            middle = (low + high) // 2
+            if self.image.string(self.entries[2 * middle]) < text:
+                low = middle + 1
+            else:
+                high = middle
+        rooms = []
+        while low < self.count and self.image.string(self.entries[2 * low]) == text:
+            rooms.append(self.entries[2 * low + 1])
+            low += 1
+        if not rooms:
+            return default
+        return rooms[0] if self.first else rooms
+
+
+class RoomView(Room):
+    """
+    Read-only view of a single room within a WorldImage, standing in for a Room so that games may be played upon the
+    image itself (see 'WorldImage.template'.) Its text is decoded out of shared memory whenever accessed. The items and
+    locks it holds are those the room was defined with, before any session played; as with any room shared between
+    games, each game's own changes to these are held by its world state (see History module).
+    """
+
+    def __init__(self, image: WorldImage, roomIndex: int):  # Room's '__init__' is not run, as the image holds all
+        self.image = image
+        self.roomIndex = self.worldIndex = roomIndex
+        (self._description, self._wordDescription, self._writtenHint, self._roomImg, storeroom,
+         self._firstDoor, self._doorCount, self._firstItem, self._itemCount) = \
+            image.ROOM.unpack_from(image.buffer, image.roomOffset + roomIndex * image.ROOM.size)
+        self.storeroom = bool(storeroom)
+
+    def __eq__(self, other):
+        return isinstance(other, RoomView) and (other.image, other.roomIndex) == (self.image, self.roomIndex)
+
+    def __hash__(self):
+        return hash((id(self.image), self.roomIndex))
+
+    @property
+    def description(self):
+        return self.image.string(self._description)
+
+    @property
+    def wordDescription(self):
+        return self.image.string(self._wordDescription)
+
+    @property
+    def writtenHint(self):
+        return self.image.string(self._writtenHint)
+
+    @property
+    def roomImg(self):
+        return self.image.string(self._roomImg)
+
+    def doorRecords(self):
+        """Yields the (direction, connected room index, locked, key) record of each of the room's doors."""
+
+        image = self.image
+        for doorIndex in range(self._firstDoor, self._firstDoor + self._doorCount):
+            direction, roomIndex, locked, key = image.DOOR.unpack_from(
+                image.buffer, image.doorOffset + doorIndex * image.DOOR.size
+            )
+            yield image.string(direction), roomIndex, bool(locked), image.string(key) if locked else None
+
+    @property
+    def doors(self):
+        return {direction: self.image.room(roomIndex) for direction, roomIndex, _, _ in self.doorRecords()}
+
+    @property
+    def keys(self):
+        return {direction: key for direction, _, locked, key in self.doorRecords() if locked}
+
+    @property
+    def _locks(self):  # Read by Room's 'locks' property, which has no world state to read from
+        return frozenset(direction for direction, _, locked, _ in self.doorRecords() if locked)
+
+    @property
+    def _items(self):  # Read by Room's 'items' property, as above
+        image = self.image
+        return tuple(
+            image.string(image.ITEM.unpack_from(image.buffer, image.itemOffset + itemIndex * image.ITEM.size)[0])
+            for itemIndex in range(self._firstItem, self._firstItem + self._itemCount)
+        )
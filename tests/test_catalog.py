@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Catalog import WorldCatalog
+from test_routing import randomGameClass
+
+
+def test_rooms_without_image_files_are_skipped(tmp_path):
+    catalog = WorldCatalog()
+    catalog.loadWorld(randomGameClass(1, 10), "No images")  # Each room's image path is "", i.e. the game's directory
+    assert "No images" in catalog.worlds
+    assert catalog.assets.addImage(str(tmp_path)) is None
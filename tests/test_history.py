@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+from History import PersistentVector
+from Sessions import Session
+
+
+def test_vector_set_shares_all_but_changed_path():
+    values = list(range(1000))
+    vector = PersistentVector.fromList(values)
+    changed = vector.set(500, "changed")
+
+    assert list(vector) == values                 # The old vector is never changed
+    assert changed.get(500) == "changed" and changed.get(499) == 499 and len(changed) == 1000
+    assert changed.root[0] is vector.root[0]      # Only nodes upon the path to element 500 are copied
+    assert changed.root[500 >> 5] is not vector.root[500 >> 5]
+    with pytest.raises(IndexError):
+        vector.set(1000, None)
+
+    empty = PersistentVector.empty(5000)
+    assert empty.root is None and empty.get(4999) is None
+    assert empty.set(4999, 1).get(4999) == 1 and empty.get(4999) is None
+
+
+def playToStorageRoom(session: Session):
+    session.runCommand("INTERACT; TAKE")
+    session.runCommand("GO EAST; INTERACT; TAKE; GO WEST; GO WEST")
+    session.runCommand("GO NORTH")                # Unlocked with the Storage Room key
+
+
+def test_undo_across_unlock_and_collect():
+    template = Game.template()
+    session = Session("undo", template)
+    game = session.game
+    playToStorageRoom(session)
+    library = game.currentRoom.doors["SOUTH"]
+    assert game.world.unlockedDoors() == ((library.worldIndex, "NORTH"),)
+
+    assert "[1 action undone.] You are in the Library." in session.runCommand("UNDO")
+    assert game.world.unlockedDoors() == ()
+    with game.world.activate():
+        assert "NORTH" in library.locks
+    assert "Storage Room key" in game.player.inventory
+    assert "no way to the Storage Room" in session.runCommand("ROUTE STORAGE ROOM")
+
+    session.runCommand("UNDO 3")                  # Back to before the Storage Room key was collected
+    diningRoom = template.rooms[template.routes.findRoom("Dining Room")]
+    with game.world.activate():
+        assert diningRoom.items == ("Storage Room key",)
+    assert game.player.inventory == ("Broken key",)
+
+    session.runCommand("GO WEST; GO WEST; GO NORTH")
+    assert game.currentRoom.description == "Library"  # The door is locked once again
+
+
+def test_restoring_old_state_leaves_other_games_alone():
+    template = Game.template()
+    sessions = [Session(str(i), template) for i in range(2)]
+    game = sessions[0].game
+    start = game.saveState()
+    playToStorageRoom(sessions[0])
+    reached = game.saveState()
+
+    game.restoreState(start)
+    assert game.currentRoom is template.startRoom and game.player.inventory == ()
+    assert game.world.unlockedDoors() == ()
+    game.restoreState(reached)
+    assert game.currentRoom.description == "Storage Room" and len(game.world.unlockedDoors()) == 1
+
+    other = sessions[1].game
+    assert other.world.unlockedDoors() == () and other.player.inventory == ()
+    with other.world.activate():
+        assert template.startRoom.items == ("Broken key",)
+
+    game.rewind(0)
+    assert game.saveState() == start and len(game.history) == 1
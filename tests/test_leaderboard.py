@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Leaderboard import Leaderboard
+
+
+def test_runs_ranked_by_each_category(tmp_path):
+    path = str(tmp_path / "lb.jsonl")
+    board = Leaderboard(path, size=3)
+    assert board.record("Mansion", "a", 30.0, 12) == {"moves": 1, "time": 1}
+    assert board.record("Mansion", "b", 20.0, 15) == {"moves": 2, "time": 1}
+    assert board.record("Mansion", "c", 40.0, 12) == {"moves": 2, "time": 3}  # Equal moves rank behind earlier runs
+    assert board.record("Mansion", "d", 50.0, 20) == {"moves": None, "time": None}
+    board.record("Other", "e", 1.0, 1)            # Each world ranked apart
+
+    assert [run["player"] for _, run in board.top("Mansion", "moves")] == ["a", "c", "b"]
+    assert [run["player"] for _, run in board.top("Mansion", "time")] == ["b", "a", "c"]
+    assert [run["player"] for _, run in board.top("Mansion", "time", 1)] == ["b"]
+
+    reloaded = Leaderboard(path, size=3)          # Every run read back from the file, ranked the same
+    assert reloaded.top("Mansion", "moves") == board.top("Mansion", "moves")
+    assert reloaded.top("Other", "time")[0][1]["player"] == "e"
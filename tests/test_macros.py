@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+from Sessions import Session
+
+
+def test_macros_expand_within_budget():
+    session = Session("macros", Game.template())
+    game = session.game
+    session.runCommand("MACRO LOOT = INTERACT; TAKE")
+    session.runCommand("MACRO LOOP = LOOP; GO EAST")  # Named within itself, so left unexpanded there
+    assert game.expandCommands("LOOT; GO EAST") == ["INTERACT", "TAKE", "GO EAST"]
+    assert game.expandCommands("LOOP") == ["LOOP", "GO EAST"]
+    assert "Collected Broken key." in session.runCommand("LOOT")
+
+    for i in range(16):                           # Each naming the last twice, so M15 stands for 65,536 commands
+        session.runCommand("MACRO M%d = %s" % (i, "M%d; M%d" % (i - 1, i - 1) if i else "INSPECT"))
+    assert len(game.expandCommands("M6")) == 64
+    assert game.expandCommands("M15") is None
+    commands = game.commands
+    output = session.runCommand("M15")
+    assert "more than %d commands or macros, so was not run." % Game.maxCommands in output
+    assert game.commands == commands              # Not a single command of the line was run
+
+    for i in range(16):                           # Macros expanding to nothing are counted as well
+        session.runCommand("MACRO E%d = %s" % (i, "E%d; E%d" % (i - 1, i - 1) if i else ";"))
+    assert game.expandCommands("E15") is None
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+
+
+def test_shared_rooms_only_change_within_a_game():
+    template = Game.template()
+    games = [Game(template=template) for _ in range(2)]
+    room = template.startRoom
+
+    with pytest.raises(RuntimeError):             # No game active, so the change would reach every game
+        room.items = ()
+    with pytest.raises(RuntimeError):
+        room.locks = frozenset()
+
+    with games[0].world.activate():
+        room.items = ()
+        room.locks = frozenset()
+    assert room.items == ("Broken key",) and room.locks
+    with games[1].world.activate():
+        assert room.items == ("Broken key",) and room.locks
@@ -0,0 +1,118 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+from Rooms import Room
+from Routing import RouteIndex, RouteTooFar
+
+DIRECTIONS = ("NORTH", "EAST", "SOUTH", "WEST", "UP", "DOWN")
+
+
+def randomGameClass(seed: int, size: int):
+    """Returns a Game subclass whose 'createRooms' lays out 'size' rooms, joined by random doors, some locked."""
+
+    class RandomGame(Game):
+        def createRooms(self):
+            generator = random.Random(seed)
+            rooms = [Room("", "Room %d" % number) for number in range(size)]
+            for room in rooms:
+                for direction in generator.sample(DIRECTIONS, generator.randint(1, 3)):
+                    room.createDoor(direction, generator.choice(rooms), locked=generator.random() < 0.4)
+            self.startRoom, self.exitRoom = rooms[0], rooms[-1]
+
+    return RandomGame
+
+
+def unlock(game: Game, room: Room, direction: str):
+    with game.world.activate():                 # Unlocked within this game's world state alone
+        room.locks = room.locks - {direction}
+
+
+def expectedDistance(game: Game, source: Room, target: Room):
+    """Finds the length of the shortest open route by searching the game's rooms directly, or None."""
+
+    distance = {source: 0}
+    queue = [source]
+    for current in queue:
+        for direction, connectedRoom in current.doors.items():
+            if direction not in current.locks and connectedRoom not in distance:
+                distance[connectedRoom] = distance[current] + 1
+                queue.append(connectedRoom)
+    return distance.get(target)
+
+
+def checkRoute(game: Game, source: Room, target: Room):
+    route = game.routes.route(game.world, source.worldIndex, target.worldIndex)
+    with game.world.activate():
+        expected = expectedDistance(game, source, target)
+        if expected is None:
+            assert route is None
+            return
+        assert route is not None and len(route) == expected
+        current = source
+        for direction in route:                 # Route must only pass doors unlocked within this game
+            assert direction not in current.locks
+            current = current.doors[direction]
+        assert current is target
+
+
+def checkUnlocking(seed: int, size: int):
+    template = randomGameClass(seed, size).template()
+    games = [template.__class__(template=template) for _ in range(2)]
+    generator = random.Random(seed)
+    for _ in range(12):
+        game = generator.choice(games)          # Unlocking within one game must never change the other's routes
+        with game.world.activate():
+            lockedDoors = [(room, direction) for room in game.rooms for direction in room.locks]
+        if lockedDoors:
+            unlock(game, *generator.choice(lockedDoors))
+        for game in games:
+            for _ in range(20):
+                checkRoute(game, generator.choice(game.rooms), generator.choice(game.rooms))
+
+
+def test_routes_match_search_as_doors_are_unlocked():
+    for seed in range(40):                      # Small enough for every route to be read from tables
+        checkUnlocking(seed, 30)
+
+
+def test_routes_match_search_beyond_tables():
+    for seed in range(5):                       # Too large for tables, so searched within the search limit
+        checkUnlocking(seed, RouteIndex.TABLE_LIMIT * 2)
+
+
+def test_search_gives_up_beyond_limit(monkeypatch):
+    class ChainGame(Game):
+        def createRooms(self):
+            rooms = [Room("", "Room %d" % number) for number in range(RouteIndex.TABLE_LIMIT + 10)]
+            for room, nextRoom in zip(rooms, rooms[1:]):
+                room.createDoor("EAST", nextRoom)
+            self.startRoom, self.exitRoom = rooms[0], rooms[-1]
+
+    game = ChainGame(template=ChainGame.template())
+    monkeypatch.setattr(RouteIndex, "SEARCH_LIMIT", 20)
+    start = game.startRoom.worldIndex
+    assert len(game.routes.route(game.world, start, game.routes.findRoom("Room 15"))) == 15
+    with pytest.raises(RouteTooFar):
+        game.routes.route(game.world, start, game.exitRoom.worldIndex)
+
+
+def test_routes_follow_undo():
+    template = randomGameClass(7, 30).template()
+    game = template.__class__(template=template)
+    generator = random.Random(7)
+    states = [game.saveState()]
+    with game.world.activate():
+        lockedDoors = [(room, direction) for room in game.rooms for direction in sorted(room.locks)][:10]
+    for room, direction in lockedDoors:
+        unlock(game, room, direction)
+        states.append(game.saveState())
+    for state in reversed(states):              # Routes found after rewinding match those of the restored locks
+        game.restoreState(state)
+        for _ in range(20):
+            checkRoute(game, generator.choice(game.rooms), generator.choice(game.rooms))
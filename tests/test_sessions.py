@@ -0,0 +1,70 @@
+import io
+import os
+import pickle
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+from Leaderboard import Leaderboard
+from Sessions import Session, SessionPickler, SessionStore, SessionUnpickler
+
+
+def makeStore(tmp_path, **options) -> SessionStore:
+    return SessionStore(spillDir=str(tmp_path / "sessions"), leaderboard=Leaderboard(str(tmp_path / "lb.jsonl")),
+                        **options)
+
+
+def test_questions_stay_open_across_lines(tmp_path):
+    store = makeStore(tmp_path)
+    sessionId = store.createSession().sessionId
+    assert "['TAKE', 'PASS']" in store.runCommand(sessionId, "INTERACT")
+    assert "Collected Broken key." in store.runCommand(sessionId, "TAKE")
+
+    store.runCommand(sessionId, "GO EAST; INTERACT; TAKE; GO WEST; GO WEST; GO NORTH")
+    store.runCommand(sessionId, "INTERACT; OPEN; STORE")
+    store.spill(sessionId)                        # Question is kept with the rest of the session
+    assert "Broken key stored." in store.runCommand(sessionId, "1")
+    assert "Storage closed." in store.runCommand(sessionId, "CLOSE")
+    assert "['Storage Room key (used)']" in store.runCommand(sessionId, "INVENTORY")
+
+
+def test_pickled_session_refers_to_its_template():
+    template = Game.template()
+    session = Session("pickled", template)
+    session.runCommand("INTERACT; TAKE; GO EAST; INTERACT; TAKE; GO WEST; GO WEST; GO NORTH")
+    file = io.BytesIO()
+    SessionPickler(file, template).dump(session)
+    assert len(file.getvalue()) < len(pickle.dumps(session)) / 2  # Holds the game's own state, not its rooms
+
+    loaded = SessionUnpickler(io.BytesIO(file.getvalue()), template).load()
+    game = loaded.game
+    assert game.rooms is template.rooms and game.routes is template.routes
+    assert game.currentRoom is session.game.currentRoom and game.world.worldRooms is template.rooms
+    assert game.player.inventory == session.game.player.inventory
+    assert game.world.unlockedDoors() == session.game.world.unlockedDoors()
+    assert "[1 action undone.]" in loaded.runCommand("UNDO")  # History survives too
+    with session.game.world.activate():
+        assert "NORTH" not in game.currentRoom.locks  # Undone within the loaded copy alone
+
+
+def test_idle_sessions_spill_and_load_back(tmp_path):
+    store = makeStore(tmp_path, maxResident=2)
+    sessionIds = [store.createSession().sessionId for _ in range(3)]
+    store.runCommand(sessionIds[0], "INTERACT; TAKE; GO EAST")
+    for sessionId in sessionIds[1:]:
+        store.runCommand(sessionId, "GO WEST")
+
+    assert sessionIds[0] not in store.resident    # Least recently used, so spilled to disk
+    assert os.path.exists(store.spillPath(sessionIds[0]))
+    assert store.locations[sessionIds[0]] == "Dining Room"
+
+    assert "['Broken key']" in store.runCommand(sessionIds[0], "INVENTORY")
+    assert not os.path.exists(store.spillPath(sessionIds[0])) and sessionIds[0] not in store.spilled
+    assert store.resident[sessionIds[0]].game.currentRoom.description == "Dining Room"
+    assert len(store.resident) == 2
+
+    store.closeSession(sessionIds[1])
+    store.spill(sessionIds[0])
+    store.closeSession(sessionIds[0])             # Removed from disk too
+    assert os.listdir(store.spillDir) == [] and len(store) == 1
@@ -0,0 +1,22 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+from Rooms import Room
+from Validator import Validator
+
+
+def test_each_one_way_door_is_named():
+    class OneWayGame(Game):
+        def createRooms(self):
+            self.startRoom, self.exitRoom = Room("", "Hall"), Room("", "Exit")
+            cellar = Room("", "Cellar")
+            self.startRoom.createDoor("east", cellar)     # Both doors lead to the cellar, with no way back
+            self.startRoom.createDoor("downstairs", cellar)
+            cellar.createDoor("south", self.exitRoom)
+
+    errors = Validator(OneWayGame.template()).errors
+    assert any("door EAST from the Hall" in error for error in errors)
+    assert any("door DOWNSTAIRS from the Hall" in error for error in errors)
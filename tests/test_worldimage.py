@@ -0,0 +1,37 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Game import Game
+from WorldImage import WorldImage
+from test_routing import randomGameClass
+
+
+def test_image_indexes_match_template():
+    template = Game.template()
+    image = WorldImage(WorldImage.compile(template))
+    imageTemplate = image.template(Game)
+
+    for room in template.rooms:
+        assert imageTemplate.routes.findRoom(room.description.lower()) == room.worldIndex
+        for item in room.items:
+            assert imageTemplate.itemRooms.get(item) == template.itemRooms[item]
+    assert imageTemplate.itemRooms.get("No such item") is None
+
+    template = randomGameClass(3, 60).template()
+    imageTemplate = WorldImage(WorldImage.compile(template)).template(template.__class__)
+    generator = random.Random(3)
+    for _ in range(200):
+        source, target = generator.randrange(len(template.rooms)), generator.randrange(len(template.rooms))
+        game, imageGame = template.__class__(template=template), template.__class__(template=imageTemplate)
+        assert imageGame.routes.route(imageGame.world, source, target) == game.routes.route(game.world, source, target)
+
+
+def test_image_views_made_only_while_in_use():
+    image = WorldImage(WorldImage.compile(Game.template()))
+    game = Game(template=image.template(Game))
+    assert game.rooms[game.currentRoom.worldIndex] is game.currentRoom
+    game.runLine("GO WEST")
+    assert len(image.views) < len(image)          # Views of rooms no longer referred to are dropped